@@ -0,0 +1,69 @@
+"""
+Latency vs. accuracy of approximate queries (df_sample / approx) against the full df.
+
+Usage: python benchmarks/bench_sampling.py [rows]
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from nexus_sampling import ApproxQuery
+
+
+def make_dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "region": rng.choice(["north", "south", "east", "west", "central"], size=rows, p=[.4, .3, .15, .1, .05]),
+        "revenue": rng.lognormal(mean=4, sigma=1, size=rows),
+        "units": rng.poisson(5, size=rows),
+        # More values than region, so it is not the strata key
+        "channel": rng.choice([f"c{i}" for i in range(8)], size=rows),
+    })
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main(rows=5_000_000):
+    df = make_dataset(rows)
+    approx, build_ms = timed(lambda: ApproxQuery(df), repeat=1)
+    print(f"Dataset: {rows:,} rows | samples: {approx.describe()} | build: {build_ms:.0f} ms\n")
+
+    cases = [
+        ("mean(revenue)",
+         lambda: pd.Series({"revenue": df["revenue"].mean()}),
+         lambda: approx.mean("revenue")),
+        ("sum(revenue) by region",
+         lambda: df.groupby("region")["revenue"].sum(),
+         lambda: approx.sum("revenue", by="region")),
+        ("sum(revenue) by channel",
+         lambda: df.groupby("channel")["revenue"].sum(),
+         lambda: approx.sum("revenue", by="channel")),
+        ("count(units > 8)",
+         lambda: pd.Series({"units > 8": float((df["units"] > 8).sum())}),
+         lambda: approx.count("units > 8")),
+    ]
+
+    print(f"{'query':<26}{'exact ms':>10}{'approx ms':>11}{'speedup':>9}{'max rel err':>13}{'in 95% CI':>11}")
+    for name, exact_fn, approx_fn in cases:
+        truth, exact_ms = timed(exact_fn)
+        estimate, approx_ms = timed(approx_fn)
+        truth = truth.reindex(estimate.index)
+        rel_err = ((estimate["estimate"] - truth).abs() / truth.abs()).max()
+        covered = ((truth >= estimate["ci_low"]) & (truth <= estimate["ci_high"])).mean()
+        print(f"{name:<26}{exact_ms:>10.1f}{approx_ms:>11.1f}{exact_ms / approx_ms:>8.1f}x"
+              f"{rel_err:>12.2%}{covered:>11.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
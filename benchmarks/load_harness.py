@@ -0,0 +1,306 @@
+"""
+Load-testing harness for the agent graph, fully offline.
+
+Swaps Groq for a scripted (or recorded) fake chat model, Tavily for a fake
+search tool and Supabase for an in-memory store, then drives N concurrent
+sessions through the same build_agent_graph / build_turn_messages /
+DataEngine paths nexus_core.py uses.
+
+Usage:
+    python benchmarks/load_harness.py --sessions 20 --turns 4
+    python benchmarks/load_harness.py --sessions 50 --llm-latency 0.8 --rows 200000
+    python benchmarks/load_harness.py --script recorded_turns.json
+
+A recorded script is a JSON list of turns:
+    [{"prompt": "...", "final": "...",
+      "steps": [{"tool": "sql_analysis", "args": {"query": "..."}, "llm_latency_s": 0.7}]}]
+"""
+import sys
+import os
+import io
+import gc
+import json
+import time
+import uuid
+import random
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from nexus_telemetry import telemetry, context
+
+# --- DEFAULT SCENARIOS ---
+# Each turn: the user prompt, the tool calls the "LLM" makes in order, and its final answer
+DEFAULT_TURNS = [
+    {"prompt": "What is total revenue by region?",
+     "steps": [{"tool": "sql_analysis",
+                "args": {"query": "SELECT region, SUM(revenue) AS revenue FROM df GROUP BY region ORDER BY 2 DESC"}}],
+     "final": "North leads revenue, followed by South."},
+    {"prompt": "Summarize the dataset and chart revenue by region.",
+     "steps": [{"tool": "python_analysis", "args": {"code": "print(df.describe())"}},
+               {"tool": "python_analysis",
+                "args": {"code": "df.groupby('region')['revenue'].sum().plot(kind='bar')\nprint('Chart ready')"}}],
+     "final": "Revenue is right-skewed; the chart shows totals per region."},
+    {"prompt": "What drives revenue?",
+     "steps": [{"tool": "python_analysis", "args": {"code": "insights.get_correlation_drivers(df, 'revenue')"}}],
+     "final": "Units is the strongest driver of revenue."},
+    {"prompt": "How does this compare with industry benchmarks?",
+     "steps": [{"tool": "tavily_search_results_json", "args": {"query": "retail revenue per region benchmark"}}],
+     "final": "Our growth is in line with published industry benchmarks."},
+]
+
+
+def lognormal_latency(rng, median_s, sigma=0.35):
+    return 0.0 if median_s <= 0 else float(rng.lognormvariate(np.log(median_s), sigma))
+
+
+# --- FAKE LLM ---
+class ScriptedChatModel(BaseChatModel):
+    """
+    Stand-in for ChatGroq. Emits the current turn's tool calls one by one
+    (one per model call, like parallel_tool_calls=False), then a final answer.
+    """
+
+    turn: dict = Field(default_factory=dict)
+    latency_s: float = 0.6
+    seed: int = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        # Steps already taken = tool results since the latest user message
+        taken = 0
+        for msg in reversed(messages):
+            if isinstance(msg, HumanMessage):
+                break
+            taken += isinstance(msg, ToolMessage)
+        steps = self.turn.get("steps", [])
+        step = steps[taken] if taken < len(steps) else None
+
+        rng = random.Random(f"{self.seed}-{taken}-{time.perf_counter_ns()}")
+        delay = (step or {}).get("llm_latency_s", self.turn.get("final_latency_s"))
+        time.sleep(delay if delay is not None else lognormal_latency(rng, self.latency_s))
+
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        if step:
+            message = AIMessage(content="", tool_calls=[{
+                "name": step["tool"], "args": step["args"], "id": f"call_{uuid.uuid4().hex[:12]}"}])
+        else:
+            message = AIMessage(content=self.turn.get("final", "Done."))
+        message.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": 60,
+                                  "total_tokens": prompt_tokens + 60}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# --- FAKE SEARCH ---
+class SearchInput(BaseModel):
+    query: str = Field(description="Search query.")
+
+
+def make_fake_search(latency_s=0.4):
+    def fake_search(query: str):
+        time.sleep(lognormal_latency(random.Random(query), latency_s))
+        return [{"url": "https://example.com/benchmarks", "content": f"Offline result for '{query}'."}]
+
+    return StructuredTool.from_function(
+        func=fake_search,
+        name="tavily_search_results_json",
+        description="Offline stand-in for Tavily search.",
+        args_schema=SearchInput,
+    )
+
+
+# --- FAKE STORAGE ---
+class InMemoryStore:
+    """Same surface as the nexus_db chat-history functions, kept in a dict."""
+
+    def __init__(self, latency_s=0.02):
+        self.latency_s = latency_s
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def save_message(self, session_id, role, content):
+        time.sleep(self.latency_s)
+        with self._lock:
+            self._rows.setdefault(session_id, []).append({"role": role, "content": content})
+
+    def load_history(self, session_id):
+        time.sleep(self.latency_s)
+        with self._lock:
+            return list(self._rows.get(session_id, []))
+
+
+# --- SESSION DRIVER ---
+def dataset_upload(rows, seed):
+    rng = np.random.default_rng(seed)
+    units = rng.poisson(20, size=rows)
+    df = pd.DataFrame({
+        "date": pd.date_range("2023-01-01", periods=rows, freq="h"),
+        "region": rng.choice(["north", "south", "east", "west"], size=rows, p=[.4, .3, .2, .1]),
+        "units": units,
+        "revenue": units * rng.normal(25, 4, size=rows),
+    })
+    upload = io.BytesIO(df.to_csv(index=False).encode())
+    upload.name = "sales.csv"
+    return upload
+
+
+def run_session(session_no, args, turns, store, build_agent_graph, build_turn_messages, callback_cls):
+    from nexus_engine import DataEngine
+
+    session_id = f"load-Session-{session_no:04d}"
+    result = {"session": session_id, "latencies": [], "errors": 0, "tool_errors": 0}
+    current = {"turn": {}}
+
+    def chat_model_factory(model_name, api_key):
+        return ScriptedChatModel(turn=current["turn"], latency_s=args.llm_latency, seed=session_no)
+
+    with context(session=session_id, model="scripted-fake"):
+        engine = DataEngine()
+        engine.load_file(dataset_upload(args.rows, session_no))
+        app = build_agent_graph(engine, chat_model_factory=chat_model_factory,
+                                search_tool=make_fake_search(args.search_latency))
+        result["dataset_bytes"] = engine.workspace.memory_used()
+
+        for t in range(args.turns):
+            turn = turns[(session_no + t) % len(turns)]
+            current["turn"] = turn
+            start = time.perf_counter()
+            try:
+                # Same sequence as the chat input handler in nexus_core.py
+                history = store.load_history(session_id)
+                store.save_message(session_id, "user", turn["prompt"])
+                messages = build_turn_messages(engine, history, turn["prompt"])
+                final_resp = ""
+                config = {"recursion_limit": 60, "callbacks": [callback_cls()]}
+                for event in app.stream({"messages": messages}, config=config, stream_mode="values"):
+                    msg = event["messages"][-1]
+                    if isinstance(msg, ToolMessage) and str(msg.content).startswith("❌"):
+                        result["tool_errors"] += 1
+                    if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls:
+                        final_resp = msg.content
+                if engine.latest_figure:
+                    engine.latest_figure.savefig(f"chart_{session_id}.png")
+                    engine.latest_figure = None
+                if final_resp:
+                    store.save_message(session_id, "assistant", final_resp)
+            except Exception as e:
+                result["errors"] += 1
+                result["last_error"] = str(e)
+            result["latencies"].append(time.perf_counter() - start)
+        plt.close('all')
+    return result
+
+
+def run_load(args, sessions, turns, store, brain):
+    telemetry.reset()
+    gc.collect()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    real_stdout = sys.stdout
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, i, args, turns, store, *brain) for i in range(sessions)]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - start
+    # run_python_analysis swaps the process-wide sys.stdout; overlapping sessions can leave it swapped
+    stdout_leaked = sys.stdout is not real_stdout
+    sys.stdout = real_stdout
+    results[0]["stdout_leaked"] = stdout_leaked
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    spans = {(r["span"], r["tool"]): r for r in telemetry.snapshot(by=("span", "tool"))}
+    return results, wall, max(rss_after - rss_before, 0) * 1024, spans
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def report(args, results, wall, rss_growth, spans, baseline_spans):
+    latencies = [x for r in results for x in r["latencies"]]
+    turns = len(latencies)
+    print(f"\n=== {args.sessions} concurrent sessions x {args.turns} turns ({args.rows:,} rows each) ===")
+    print(f"Throughput:        {turns / wall:.2f} turns/s ({turns} turns in {wall:.1f} s)")
+    print(f"Turn latency:      p50 {percentile(latencies, 50):.2f} s | p99 {percentile(latencies, 99):.2f} s")
+    print(f"Errors:            {sum(r['errors'] for r in results)} turns, "
+          f"{sum(r['tool_errors'] for r in results)} tool results starting with ❌")
+    if results[0].get("stdout_leaked"):
+        print("Shared state:      sys.stdout was left redirected by overlapping python_analysis calls "
+              "(stdout capture is process-wide)")
+    print(f"Memory / session:  {np.mean([r['dataset_bytes'] for r in results]) / 1e6:.1f} MB datasets, "
+          f"{rss_growth / max(args.sessions, 1) / 1e6:.1f} MB peak RSS growth")
+
+    # Contention: spans whose median grows most versus a single session
+    print("\nContention (p50 under load vs. single session):")
+    print(f"{'span':<34}{'count':>7}{'p50 ms':>10}{'solo ms':>10}{'slowdown':>10}")
+    rows = []
+    for key, row in spans.items():
+        solo = baseline_spans.get(key, {}).get("p50_ms", 0.0)
+        rows.append((row["p50_ms"] / solo if solo else float("nan"), key, row, solo))
+    for slowdown, (name, tool), row, solo in sorted(rows, key=lambda r: -np.nan_to_num(r[0])):
+        label = f"{name}:{tool}" if tool else name
+        print(f"{label:<34}{row['count']:>7}{row['p50_ms']:>10.1f}{solo:>10.1f}{slowdown:>9.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows in each session's dataset")
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="Median fake LLM latency (s)")
+    parser.add_argument("--search-latency", type=float, default=0.4, help="Median fake search latency (s)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Fake storage latency per call (s)")
+    parser.add_argument("--script", help="JSON file of recorded turns (see module docstring)")
+    args = parser.parse_args(argv)
+
+    turns = DEFAULT_TURNS
+    if args.script:
+        with open(args.script) as f:
+            turns = json.load(f)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    # nexus_brain reads API keys from Streamlit secrets at import; give it placeholders
+    workdir = tempfile.mkdtemp(prefix="nexus_load_")
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('GROQ_API_KEYS = "offline-groq"\nTAVILY_API_KEYS = "offline-tavily"\n')
+    cwd = os.getcwd()
+    os.chdir(workdir)  # charts are written to the working directory, as in nexus_core
+    try:
+        from nexus_brain import build_agent_graph, build_turn_messages, ToolTelemetryCallback
+        brain = (build_agent_graph, build_turn_messages, ToolTelemetryCallback)
+
+        # Solo run covers every scripted turn so each span has a baseline
+        solo_args = argparse.Namespace(**{**vars(args), "sessions": 1, "turns": max(args.turns, len(turns))})
+        _, _, _, baseline_spans = run_load(solo_args, 1, turns, InMemoryStore(args.db_latency), brain)
+        results, wall, rss_growth, spans = run_load(args, args.sessions, turns,
+                                                    InMemoryStore(args.db_latency), brain)
+        report(args, results, wall, rss_growth, spans, baseline_spans)
+    finally:
+        os.chdir(cwd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Offline benchmark suite for the data and reporting hot paths.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # quick profile, print results
+    python benchmarks/run_benchmarks.py --profile full       # 10K..10M rows, up to 2,000 columns
+    python benchmarks/run_benchmarks.py --save-baseline      # write benchmarks/baselines/<profile>.json
+    python benchmarks/run_benchmarks.py --compare            # exit 1 if any benchmark regresses
+    python benchmarks/run_benchmarks.py --only insights      # substring filter on benchmark names
+
+Everything is generated locally; no network or secrets are needed.
+"""
+import sys
+import os
+import io
+import gc
+import json
+import time
+import argparse
+import statistics
+import platform
+import shutil
+import tempfile
+import warnings
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from nexus_engine import DataEngine
+from nexus_insights import InsightModule
+from nexus_registry import DatasetRegistry
+from nexus_report import generate_pdf
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+# A benchmark fails --compare when it is this many times slower than its baseline
+DEFAULT_THRESHOLD = 1.5
+# ...and at least this much slower in absolute terms; short benchmarks jitter by tens of ms
+NOISE_FLOOR_S = 0.05
+# Runs per benchmark; the median is recorded
+DEFAULT_REPEAT = 5
+
+# (rows, columns) shapes per profile
+PROFILES = {
+    "quick": [(10_000, 5), (10_000, 200)],
+    "full": [(10_000, 5), (100_000, 20), (1_000_000, 10), (10_000_000, 5), (10_000, 2_000)],
+}
+PDF_HISTORY_SIZES = {"quick": [200], "full": [200, 2_000]}
+
+
+# --- DATA GENERATION ---
+def make_dataset(rows, cols, seed=0):
+    """A date column, a region column and (cols - 2) numeric measures m0, m1, ..."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "date": pd.date_range("2020-01-01", periods=rows, freq="min"),
+        "region": rng.choice(["north", "south", "east", "west"], size=rows),
+    }
+    for i in range(max(cols - 2, 1)):
+        data[f"m{i}"] = rng.normal(100, 15, size=rows)
+    return pd.DataFrame(data)
+
+
+def make_history(messages):
+    text = "Revenue grew 12% quarter over quarter, driven mostly by the north region. " * 8
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": text} for i in range(messages)]
+
+
+def as_upload(payload, name):
+    upload = io.BytesIO(payload)
+    upload.name = name
+    return upload
+
+
+def loaded_engine(df):
+    engine = DataEngine()
+    engine.df = df
+    engine.scope["df"] = df
+    engine.column_str = ", ".join(df.columns)
+    return engine
+
+
+# --- BENCHMARKS ---
+# Each entry: name -> (max cells it runs on, setup(df) -> zero-arg callable)
+def _load(fmt):
+    def setup(df):
+        buf = io.BytesIO()
+        if fmt == "csv":
+            df.to_csv(buf, index=False)
+        elif fmt == "xlsx":
+            df.to_excel(buf, index=False)
+        else:
+            df.to_json(buf, orient="records", date_format="iso")
+        payload = buf.getvalue()
+        # Private registry per run, or repeats would be served from the shared parse cache
+        return lambda: DataEngine(dataset_registry=DatasetRegistry()).load_file(as_upload(payload, f"bench.{fmt}"))
+    return setup
+
+
+def _heal_code(df):
+    engine = loaded_engine(df)
+    cols = [c.upper() for c in df.columns[:50]]
+    code = "\n".join(f"x = df['{c}'].mean()\nprint(df.corr())" for c in cols)
+    return lambda: engine._heal_code(code)
+
+
+def _python_analysis(code):
+    def setup(df):
+        engine = loaded_engine(df)
+        return lambda: engine.run_python_analysis(code)
+    return setup
+
+
+def _insight(method, *args, **kwargs):
+    def setup(df):
+        # Fresh module per run so the forecast/correlation caches don't hide the cost
+        return lambda: getattr(InsightModule(), method)(df, *args, **kwargs)
+    return setup
+
+
+BENCHMARKS = {
+    "load_file.csv": (50_000_000, _load("csv")),
+    "load_file.xlsx": (200_000, _load("xlsx")),
+    "load_file.json": (5_000_000, _load("json")),
+    "engine._heal_code": (float("inf"), _heal_code),
+    "run_python_analysis.print": (float("inf"), _python_analysis("print(df.describe())")),
+    "run_python_analysis.plot": (20_000_000, _python_analysis("df['m0'].head(5000).plot()\nprint('ok')")),
+    "insights.check_anomalies": (10_000_000, _insight("check_anomalies", "m0")),
+    "insights.forecast_series": (10_000_000, _insight("forecast_series", "date", "m0", periods=30)),
+    "insights.forecast_many": (10_000_000, _insight("forecast_many", "date", "m0", "region", periods=30)),
+    "insights.get_correlation_drivers": (float("inf"), _insight("get_correlation_drivers", "m0")),
+}
+
+
+def measure(fn, repeat):
+    """Median wall-clock time over `repeat` runs, with chatter and figures discarded."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        with redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        plt.close('all')
+    return statistics.median(timings)
+
+
+def run_suite(profile, only=None, repeat=DEFAULT_REPEAT):
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="nexus_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # generate_pdf and charts write into the working directory
+    try:
+        for rows, cols in PROFILES[profile]:
+            df = None
+            for name, (max_cells, setup) in BENCHMARKS.items():
+                if (only and only not in name) or rows * cols > max_cells:
+                    continue
+                df = make_dataset(rows, cols) if df is None else df
+                key = f"{name}[{rows}x{cols}]"
+                results[key] = measure(setup(df), repeat)
+                print(f"{key:<55}{results[key] * 1000:>12.1f} ms", flush=True)
+            del df
+
+        for messages in PDF_HISTORY_SIZES[profile]:
+            key = f"report.generate_pdf[{messages} msgs]"
+            if only and only not in key:
+                continue
+            history = make_history(messages)
+            results[key] = measure(lambda: generate_pdf(history, "bench"), repeat)
+            print(f"{key:<55}{results[key] * 1000:>12.1f} ms", flush=True)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# --- BASELINES ---
+def baseline_path(profile):
+    return os.path.join(BASELINE_DIR, f"{profile}.json")
+
+
+def save_baseline(profile, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    payload = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "results_s": results,
+    }
+    with open(baseline_path(profile), "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns (key, current, baseline, ratio) for every benchmark slower than threshold x baseline
+    and more than NOISE_FLOOR_S slower in absolute terms."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None or current - base < NOISE_FLOOR_S:
+            continue
+        ratio = current / base
+        if ratio > threshold:
+            regressions.append((key, current, base, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.profile, args.only, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baseline(args.profile, results)
+        print(f"Baseline saved to {baseline_path(args.profile)}")
+    if args.compare:
+        if not os.path.exists(baseline_path(args.profile)):
+            print(f"❌ No baseline at {baseline_path(args.profile)}. Run with --save-baseline first.")
+            return 2
+        with open(baseline_path(args.profile)) as f:
+            baseline = json.load(f)["results_s"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, current, base, ratio in regressions:
+            print(f"❌ REGRESSION {key}: {current * 1000:.1f} ms vs {base * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"✅ No benchmark exceeded {args.threshold:.2f}x its baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
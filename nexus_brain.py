@@ -1,14 +1,17 @@
 import streamlit as st
 import os
 import operator
+import time
 from typing import TypedDict, Annotated, Sequence
 from langchain_groq import ChatGroq
 from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.tools import StructuredTool
 from langgraph.graph import StateGraph, START
 from langgraph.prebuilt import ToolNode, tools_condition
 from pydantic import BaseModel, Field
+from nexus_telemetry import span, telemetry
 
 # --- CONFIGURATION ---
 # We prioritize the 70b model for logic, but fallback to 8b if needed
@@ -25,6 +28,20 @@ if not GROQ_KEYS or not TAVILY_KEYS:
     st.error("⚠️ System Halted: Missing API Keys in Secrets.")
     st.stop()
 
+# --- TURN BUDGET ---
+# Per-turn limits enforced inside the graph; override any of them with a [TURN_BUDGET] table in secrets
+DEFAULT_TURN_BUDGET = {
+    "max_llm_calls": 12,
+    "max_tokens": 60_000,
+    "max_tool_calls": 10,
+    "max_seconds": 120,
+    # Stop when the exact same code fails with the same error this many times
+    "max_identical_failures": 2,
+    # Stop when any code fails with the same error this many times
+    "max_same_error": 3,
+}
+TURN_BUDGET = {**DEFAULT_TURN_BUDGET, **dict(st.secrets.get("TURN_BUDGET", {}))}
+
 
 # --- KEY MANAGEMENT ---
 def init_keys():
@@ -49,16 +66,43 @@ def get_key_status():
     return f"Active Key: Groq-{st.session_state.groq_idx + 1}"
 
 
+# --- TELEMETRY ---
+class ToolTelemetryCallback(BaseCallbackHandler):
+    """Records a 'tool' span for every tool call the graph makes (search, python, sql)."""
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name", "unknown")
+        self._starts[run_id] = (name, time.perf_counter())
+
+    def _finish(self, run_id, error):
+        name, start = self._starts.pop(run_id, ("unknown", None))
+        if start is not None:
+            telemetry.record("tool", time.perf_counter() - start, error=error, tool=name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+
 # --- AGENT SETUP ---
 class PythonInput(BaseModel):
     code: str = Field(description="Python code to execute. Always print output.")
 
 
-def get_tools(data_engine):
+class SQLInput(BaseModel):
+    query: str = Field(description="DuckDB SQL query. Tables are named after DataFrames in scope, e.g. 'df'.")
+
+
+def get_tools(data_engine, search_tool=None):
     update_env_vars()
 
     # Tool 1: Web Search
-    search = TavilySearchResults(max_results=2)
+    search = search_tool or TavilySearchResults(max_results=2)
 
     # Tool 2: Python Engine
     def python_wrapper(code: str):
@@ -71,37 +115,176 @@ def get_tools(data_engine):
         args_schema=PythonInput
     )
 
-    return [search, python_tool]
+    # Tool 3: SQL Engine
+    def sql_wrapper(query: str):
+        return data_engine.run_sql_analysis(query)
+
+    sql_tool = StructuredTool.from_function(
+        func=sql_wrapper,
+        name="sql_analysis",
+        description="Runs DuckDB SQL over loaded DataFrames (table 'df'). Fast for groupbys, joins and filters. "
+                    "Result is also stored as 'sql_result' for python_analysis.",
+        args_schema=SQLInput
+    )
+
+    return [search, python_tool, sql_tool]
+
+
+# --- PROMPT ---
+def build_turn_messages(engine, history, prompt):
+    """System prompt for the engine's current data, the last two history messages and the new prompt."""
+    # System Prompt
+    system_text = "You are GuruAi, an advanced data analysis AI. You have access to a Python environment."
+    has_data = "df" in engine.scope
+
+    if has_data:
+        system_text += f"""
+        [DATA MODE ACTIVE]
+        1. Variable 'df' is loaded.
+        2. VALID COLUMNS: [{engine.column_str}]
+        3. TABLES: {engine.workspace.summary()}
+           - In Python use tables['name']; in SQL use the table name directly. Join across them as needed.
+        4. RULES:
+           - Plan your step before writing code.
+           - Use 'sql_analysis' (DuckDB SQL, table 'df') for aggregations, groupbys, joins and filters.
+           - Use 'python_analysis' for plots, statistics and anything SQL can't express.
+           - When plotting, ALWAYS ensure the figure is created.
+           - For per-group forecasts (e.g. revenue per region), call insights.forecast_many(df, date_col, value_col, group_col, periods) once instead of looping.
+        """
+        if engine.sampling_active:
+            system_text += f"""
+        [APPROXIMATE MODE AVAILABLE]
+        - 'df_sample' is a uniform sample ({engine.approx.describe()}).
+        - 'approx' gives estimates with 95% bounds: approx.mean(col, by=None), approx.sum(col, by=None),
+          approx.count(condition=None), approx.proportion(condition) (conditions are df.query strings).
+        - Use them for exploration, rough magnitudes, and charts of distributions.
+        - Use the full 'df' for exact figures the user will quote, small groups, or rare events.
+        - When you report an approximate result, say it is an estimate and give the bounds.
+        """
+    else:
+        system_text += """
+        [SANDBOX MODE ACTIVE]
+        1. No file loaded.
+        2. You can still use 'python_analysis' to:
+           - Generate synthetic data.
+           - Perform math calculations.
+        3. If asked for real-world facts/news, use 'tavily'.
+        """
+
+    # Context Window
+    recent_history = history[-2:]
+
+    return [SystemMessage(content=system_text)] + \
+           [HumanMessage(content=m["content"]) if m["role"] == "user" else AIMessage(content=m["content"]) for m in
+            recent_history] + \
+           [HumanMessage(content=prompt)]
 
 
 # --- AGENT GRAPH ---
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
-
-
-def build_agent_graph(data_engine):
+    # Turn budget bookkeeping (absent until the first agent step)
+    started_at: float
+    llm_calls: int
+    tokens: int
+    tool_calls: int
+    failures: Annotated[list, operator.add]
+    budget_status: str
+
+
+def failure_signature(tool_call, content):
+    """(code fingerprint, error fingerprint) for a failed tool call."""
+    args = tool_call.get("args", {})
+    code = " ".join(str(args.get("code", args.get("query", args))).split())
+    error = content.strip().splitlines()[0][:200] if content.strip() else ""
+    return [f"{tool_call.get('name')}:{hash(code)}", error]
+
+
+def budget_exceeded(state, budget):
+    """Reason the turn must stop now, or None while it is within budget."""
+    if state.get("llm_calls", 0) >= budget["max_llm_calls"]:
+        return f"{budget['max_llm_calls']} LLM calls"
+    if state.get("tokens", 0) >= budget["max_tokens"]:
+        return f"{budget['max_tokens']:,} tokens"
+    if state.get("tool_calls", 0) >= budget["max_tool_calls"]:
+        return f"{budget['max_tool_calls']} tool executions"
+    if state.get("started_at") and time.time() - state["started_at"] >= budget["max_seconds"]:
+        return f"{budget['max_seconds']} s wall-clock"
+
+    failures = state.get("failures", [])
+    codes = [tuple(f) for f in failures]
+    errors = [f[1] for f in failures]
+    if codes and codes.count(codes[-1]) >= budget["max_identical_failures"]:
+        return "the same code failed repeatedly"
+    if errors and errors.count(errors[-1]) >= budget["max_same_error"]:
+        return f"the same error repeated: {errors[-1][:120]}"
+    return None
+
+
+def partial_answer(state, reason):
+    """Best answer available without another LLM call: last AI text, else last good tool output."""
+    best = ""
+    for msg in reversed(state["messages"]):
+        if isinstance(msg, AIMessage) and msg.content and not str(msg.content).startswith("❌"):
+            best = str(msg.content)
+            break
+        if isinstance(msg, ToolMessage) and msg.content and not str(msg.content).startswith("❌"):
+            best = f"Latest successful result:\n{str(msg.content)[:3000]}"
+            break
+        if isinstance(msg, HumanMessage):
+            break
+    content = f"⚠️ Stopped early: turn budget exhausted ({reason})."
+    if best:
+        content += f"\n\n{best}"
+    else:
+        content += " No usable result was produced; try rephrasing or narrowing the question."
+    return AIMessage(content=content, response_metadata={"budget_status": "exhausted", "reason": reason})
+
+
+def groq_chat_model(model_name, api_key):
+    return ChatGroq(model=model_name, temperature=0.0, api_key=api_key)
+
+
+def build_agent_graph(data_engine, chat_model_factory=groq_chat_model, search_tool=None, budget=None):
+    """
+    Compiles the agent graph. chat_model_factory(model_name, api_key) and
+    search_tool can be swapped out (e.g. by the offline load harness);
+    budget overrides entries of TURN_BUDGET.
+    """
     init_keys()
+    budget = {**TURN_BUDGET, **(budget or {})}
 
     def agent_node(state):
+        started_at = state.get("started_at") or time.time()
+        reason = budget_exceeded({**state, "started_at": started_at}, budget)
+        if reason:
+            return {"messages": [partial_answer(state, reason)], "budget_status": "exhausted"}
+
         # Try SMART model first, then FAST model
         models_to_try = [MODEL_SMART, MODEL_FAST]
 
         last_error = None
+        llm_calls = state.get("llm_calls", 0)
 
         for model_name in models_to_try:
             try:
-                tools = get_tools(data_engine)
+                tools = get_tools(data_engine, search_tool)
                 key = os.environ["GROQ_API_KEY"]
 
                 # CRITICAL: parallel_tool_calls=False prevents the "Double Code" bug
-                llm = ChatGroq(
-                    model=model_name,
-                    temperature=0.0,
-                    api_key=key
-                ).bind_tools(tools, parallel_tool_calls=False)
-
-                response = llm.invoke(state["messages"])
-                return {"messages": [response]}
+                llm = chat_model_factory(model_name, key).bind_tools(tools, parallel_tool_calls=False)
+
+                llm_calls += 1
+                with span("llm_call", model=model_name, key=f"groq-{st.session_state.groq_idx + 1}"):
+                    response = llm.invoke(state["messages"])
+                usage = getattr(response, "usage_metadata", None) or {}
+                return {
+                    "messages": [response],
+                    "started_at": started_at,
+                    "llm_calls": llm_calls,
+                    "tokens": state.get("tokens", 0) + usage.get("total_tokens", 0),
+                    "budget_status": "ok",
+                }
 
             except Exception as e:
                 # If it's a Rate Limit (429), rotate key and retry SAME model
@@ -114,14 +297,31 @@ def build_agent_graph(data_engine):
                 continue
 
         # If all fail
-        return {"messages": [AIMessage(content=f"❌ System Busy. Error: {str(last_error)}")]}
+        return {"messages": [AIMessage(content=f"❌ System Busy. Error: {str(last_error)}")],
+                "started_at": started_at, "llm_calls": llm_calls}
+
+    tool_node = ToolNode(get_tools(data_engine, search_tool))
+
+    def tools_node(state, config):
+        result = tool_node.invoke(state, config)
+        calls = {c["id"]: c for c in getattr(state["messages"][-1], "tool_calls", [])}
+        failures = []
+        for msg in result["messages"]:
+            content = str(msg.content)
+            if content.startswith("❌") or getattr(msg, "status", None) == "error":
+                failures.append(failure_signature(calls.get(msg.tool_call_id, {}), content))
+        return {
+            "messages": result["messages"],
+            "tool_calls": state.get("tool_calls", 0) + len(result["messages"]),
+            "failures": failures,
+        }
 
     workflow = StateGraph(AgentState)
     workflow.add_node("agent", agent_node)
-    workflow.add_node("tools", ToolNode(get_tools(data_engine)))
+    workflow.add_node("tools", tools_node)
 
     workflow.add_edge(START, "agent")
     workflow.add_conditional_edges("agent", tools_condition)
     workflow.add_edge("tools", "agent")
 
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile()
@@ -1,14 +1,12 @@
 import streamlit as st
 import uuid
-import matplotlib.pyplot as plt
 import os
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 # --- CUSTOM MODULES ---
+# Only what the login screen needs is imported up front; see HEAVY MODULES below
 from nexus_db import init_db, save_message, load_history, clear_session, get_all_sessions, save_setting, load_setting
 from themes import THEMES, inject_theme_css
-from nexus_engine import DataEngine
-from nexus_brain import build_agent_graph, get_key_status
+from nexus_telemetry import span, set_context, telemetry, start_metrics_server, DEFAULT_METRICS_PORT
 
 # --- SECURITY & REPORTING MODULES ---
 from nexus_security import check_password, logout
@@ -17,10 +15,34 @@ from nexus_report import generate_pdf
 # --- UI CONFIG ---
 st.set_page_config(page_title="Guru AI", layout="wide", page_icon="⚡")
 
+# --- METRICS ENDPOINT (once per process) ---
+@st.cache_resource
+def metrics_server():
+    return start_metrics_server(int(st.secrets.get("METRICS_PORT", DEFAULT_METRICS_PORT)))
+
+
+metrics_server()
+
 # --- 1. SECURITY GATE (Login Screen) ---
 if not check_password():
     st.stop()
 
+# --- HEAVY MODULES (deferred until after login) ---
+# pandas/matplotlib, the data engine and the LLM/search stack take seconds to import
+import pandas as pd
+import matplotlib.pyplot as plt
+from langchain_core.messages import AIMessage
+from nexus_engine import DataEngine, prewarm_analytics
+from nexus_brain import build_agent_graph, build_turn_messages, get_key_status, ToolTelemetryCallback
+
+
+@st.cache_resource
+def analytics_prewarm():
+    # Once per process: load sklearn/statsmodels/seaborn while the user reads the page
+    return prewarm_analytics()
+
+
+analytics_prewarm()
 init_db()
 
 # --- INITIALIZE STATE ---
@@ -40,6 +62,7 @@ if not st.session_state.current_session_id.startswith(f"{current_user}-"):
     st.session_state.current_session_id = f"{current_user}-Session-{uuid.uuid4().hex[:4]}"
 
 current_sess = st.session_state.current_session_id
+set_context(session=current_sess)
 
 # --- BUILD BRAIN ---
 app = build_agent_graph(engine)
@@ -86,10 +109,11 @@ with st.sidebar:
 
     # --- 3. DATA CENTER ---
     st.markdown("### 📂 Data Center")
-    uploaded_file = st.file_uploader("Upload Dataset", type=['csv', 'xlsx', 'xls', 'json'],
-                                     help="Supported: CSV, Excel, JSON")
+    uploaded_files = st.file_uploader("Upload Datasets", type=['csv', 'xlsx', 'xls', 'json'],
+                                      accept_multiple_files=True,
+                                      help="Supported: CSV, Excel, JSON. Each file becomes a named table.")
 
-    if uploaded_file:
+    for uploaded_file in uploaded_files or []:
         status = engine.load_file(uploaded_file)
         if "Error" in status:
             st.error(status)
@@ -113,6 +137,19 @@ with st.sidebar:
         with open(pdf_file, "rb") as f:
             st.download_button("⬇️ Download PDF", f, file_name=pdf_file, use_container_width=True)
 
+    st.divider()
+
+    # --- 5. DEBUG: PERFORMANCE ---
+    with st.expander("🛠️ Performance (this session)"):
+        stats = telemetry.snapshot(by=("span", "tool", "model"), session=current_sess)
+        if stats:
+            st.dataframe(pd.DataFrame(stats), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No timings recorded yet.")
+        shared = engine.registry.stats()
+        st.caption(f"Shared datasets: {shared['datasets']} held by {shared['sessions']} session(s), "
+                   f"{shared['bytes_held'] / 1e6:.1f} MB in memory, {shared['bytes_saved'] / 1e6:.1f} MB saved")
+
 
 # --- CHAT INTERFACE ---
 st.title("Guru Intelligent Analytics")
@@ -137,65 +174,44 @@ if prompt:
     if engine.df is not None and not engine.column_str:
         engine.column_str = ", ".join(list(engine.df.columns))
 
-    # 3. Construct System Prompt
-    system_text = "You are GuruAi, an advanced data analysis AI. You have access to a Python environment."
-    has_data = "df" in engine.scope
-
-    if has_data:
-        system_text += f"""
-        [DATA MODE ACTIVE]
-        1. Variable 'df' is loaded.
-        2. VALID COLUMNS: [{engine.column_str}]
-        3. RULES:
-           - Plan your step before writing code.
-           - Use 'python_analysis' for all data queries.
-           - When plotting, ALWAYS ensure the figure is created.
-        """
-    else:
-        system_text += """
-        [SANDBOX MODE ACTIVE]
-        1. No file loaded.
-        2. You can still use 'python_analysis' to:
-           - Generate synthetic data.
-           - Perform math calculations.
-        3. If asked for real-world facts/news, use 'tavily'.
-        """
-
-    # 4. Context Window
-    recent_history = history[-2:]
-
-    messages = [SystemMessage(content=system_text)] + \
-               [HumanMessage(content=m["content"]) if m["role"] == "user" else AIMessage(content=m["content"]) for m in
-                recent_history] + \
-               [HumanMessage(content=prompt)]
-
-    # 5. Run Agent
+    # 3. Construct System Prompt + Context Window
+    messages = build_turn_messages(engine, history, prompt)
+
+    # 4. Run Agent
     with st.chat_message("assistant", avatar=theme_data["ai_avatar"]):
         status_box = st.status("Thinking...", expanded=True)
         try:
             final_resp = ""
             # Stream the graph events
-            for event in app.stream({"messages": messages}, config={"recursion_limit": 60}, stream_mode="values"):
-                msg = event["messages"][-1]
+            config = {"recursion_limit": 60, "callbacks": [ToolTelemetryCallback()]}
+            with span("turn"):
+                budget_status = "ok"
+                for event in app.stream({"messages": messages}, config=config, stream_mode="values"):
+                    msg = event["messages"][-1]
+                    budget_status = event.get("budget_status", budget_status)
 
-                if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                    for t in msg.tool_calls:
-                        status_box.write(f"⚙️ Action: `{t['name']}`")
+                    if hasattr(msg, 'tool_calls') and msg.tool_calls:
+                        for t in msg.tool_calls:
+                            status_box.write(f"⚙️ Action: `{t['name']}`")
 
-                if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls:
-                    final_resp = msg.content
+                    if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls:
+                        final_resp = msg.content
 
             # A. Render Chart (if generated)
             if engine.latest_figure:
                 st.pyplot(engine.latest_figure)
                 chart_path = f"chart_{current_sess}.png"
-                engine.latest_figure.savefig(chart_path)
+                with span("savefig"):
+                    engine.latest_figure.savefig(chart_path)
                 engine.latest_figure = None
 
             # B. Render Text Response
             if final_resp:
                 st.markdown(final_resp)
-                status_box.update(label="Complete", state="complete", expanded=False)
+                if budget_status == "exhausted":
+                    status_box.update(label="Stopped: turn budget exhausted", state="error", expanded=False)
+                else:
+                    status_box.update(label="Complete", state="complete", expanded=False)
                 save_message(current_sess, "assistant", final_resp)
             else:
                 status_box.update(label="Task Completed", state="complete", expanded=False)
@@ -1,11 +1,18 @@
 import streamlit as st
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+from nexus_telemetry import traced
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 # --- CONNECTION MANAGER ---
+@traced("db.get_supabase_client")
 @st.cache_resource
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """Establishes a connection to Supabase using secrets."""
+    # Deferred: the supabase client stack is only needed once someone logs in or signs up
+    from supabase import create_client
     try:
         url = st.secrets["SUPABASE_URL"]
         key = st.secrets["SUPABASE_KEY"]
@@ -15,6 +22,7 @@ def get_supabase_client() -> Client:
         st.stop()
 
 
+@traced("db.init_db")
 def init_db():
     """Verifies database connection on startup."""
     try:
@@ -28,6 +36,7 @@ def init_db():
 
 # --- CHAT HISTORY FUNCTIONS ---
 
+@traced("db.save_message")
 def save_message(session_id, role, content):
     """Saves a message to Supabase with the current username."""
     client = get_supabase_client()
@@ -42,6 +51,7 @@ def save_message(session_id, role, content):
     client.table("chat_history").insert(data).execute()
 
 
+@traced("db.load_history")
 def load_history(session_id):
     """Loads chat history for a specific session."""
     client = get_supabase_client()
@@ -53,12 +63,14 @@ def load_history(session_id):
     return response.data
 
 
+@traced("db.clear_session")
 def clear_session(session_id):
     """Deletes all messages for a specific session."""
     client = get_supabase_client()
     client.table("chat_history").delete().eq("session_id", session_id).execute()
 
 
+@traced("db.get_all_sessions")
 def get_all_sessions():
     """Retrieves unique session IDs for the logged-in user."""
     client = get_supabase_client()
@@ -86,9 +98,11 @@ def get_all_sessions():
 # --- SETTINGS MANAGEMENT ---
 # (Falling back to Session State for simplicity to avoid needing another SQL table)
 
+@traced("db.save_setting")
 def save_setting(key, value):
     st.session_state[f"setting_{key}"] = value
 
 
+@traced("db.load_setting")
 def load_setting(key, default):
     return st.session_state.get(f"setting_{key}", default)
\ No newline at end of file
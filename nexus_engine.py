@@ -3,43 +3,197 @@ import pandas as pd
 import numpy as np
 import sys
 import re
+import builtins
+import threading
+import uuid
+import weakref
+import importlib
 import matplotlib
 # ✅ FIX: Force non-interactive backend for Cloud
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
-from io import StringIO
+from io import BytesIO, StringIO, TextIOBase
 from nexus_insights import InsightModule
+from nexus_registry import registry as shared_registry, content_key, SharedHandle
+from nexus_sampling import ApproxQuery, SAMPLE_MIN_ROWS
+from nexus_telemetry import traced
+from nexus_workspace import Workspace, table_name_from_file, DEFAULT_MEMORY_BUDGET_MB
+
+
+class DeferredModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    A plain import under the import lock, so the prewarm thread and the
+    sandbox can race on it safely (importlib's LazyLoader can't before 3.12).
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+    def __repr__(self):
+        return f"<deferred module '{self._name}'>"
+
+
+# seaborn pulls in scipy; load it when sandbox code first touches sns, not at startup
+sns = DeferredModule("seaborn")
+
+
+def prewarm_analytics():
+    """Imports the deferred analytics stack on a daemon thread, off the request path."""
+    def warm():
+        import sklearn.ensemble  # noqa: F401
+        import statsmodels.tsa.holtwinters  # noqa: F401
+        import seaborn  # noqa: F401
+
+    thread = threading.Thread(target=warm, daemon=True, name="nexus-prewarm")
+    thread.start()
+    return thread
+
+# Rows returned to the agent from a single SQL query
+SQL_MAX_ROWS = 50
+# Characters of captured stdout sent back to the agent (split between head and tail)
+OUTPUT_MAX_CHARS = 8000
+# Printed DataFrames/Series larger than this are summarized instead of repr'd
+SUMMARY_MAX_ROWS = 20
+SUMMARY_MAX_COLS = 20
+
+
+class BoundedOutput(TextIOBase):
+    """
+    stdout replacement that keeps only the head and tail of what is written.
+    Memory stays bounded no matter how much the sandbox prints.
+    """
+
+    def __init__(self, max_chars=OUTPUT_MAX_CHARS):
+        self.head_size = max_chars // 2
+        self.tail_size = max_chars - self.head_size
+        self.head = []
+        self.head_len = 0
+        self.tail = ""
+        self.chars_written = 0
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        written = len(text)
+        self.chars_written += written
+        self.bytes_written += len(text.encode("utf-8", "replace"))
+        room = self.head_size - self.head_len
+        if room > 0:
+            self.head.append(text[:room])
+            self.head_len += min(room, len(text))
+            text = text[room:]
+        if text:
+            # Amortized trim: let the tail grow to 2x before cutting it back
+            self.tail += text
+            if len(self.tail) > 2 * self.tail_size:
+                self.tail = self.tail[-self.tail_size:]
+        return written
+
+    @property
+    def truncated(self):
+        return self.chars_written > self.head_size + self.tail_size
+
+    def getvalue(self):
+        head = "".join(self.head)
+        if not self.truncated:
+            return head + self.tail
+        skipped = self.chars_written - self.head_len - self.tail_size
+        return f"{head}\n... [{skipped:,} characters truncated] ...\n{self.tail[-self.tail_size:]}"
+
+
+def summarize_frame(obj, max_rows=SUMMARY_MAX_ROWS, max_cols=SUMMARY_MAX_COLS):
+    """Shape, head and describe() for large DataFrames/Series; anything else passes through."""
+    if isinstance(obj, pd.DataFrame) and (len(obj) > max_rows or len(obj.columns) > max_cols):
+        head = obj.iloc[:5, :max_cols].to_string()
+        stats = obj.iloc[:, :max_cols].describe().to_string()
+        more = f" (first {max_cols} columns shown)" if len(obj.columns) > max_cols else ""
+        return f"<DataFrame: {obj.shape[0]:,} rows x {obj.shape[1]:,} columns{more}>\n{head}\n\nSummary:\n{stats}"
+    if isinstance(obj, pd.Series) and len(obj) > max_rows:
+        return f"<Series '{obj.name}': {len(obj):,} values>\n{obj.head(5).to_string()}\n\nSummary:\n{obj.describe().to_string()}"
+    return obj
 
 class DataEngine:
-    def __init__(self):
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, max_output_chars=OUTPUT_MAX_CHARS,
+                 summary_max_rows=SUMMARY_MAX_ROWS, summary_max_cols=SUMMARY_MAX_COLS,
+                 dataset_registry=shared_registry):
         self.insights = InsightModule()
+        # Parsed uploads are shared process-wide; this session's references die with it
+        self.registry = dataset_registry
+        self.session_token = uuid.uuid4().hex
+        self._dataset_keys = {}
+        weakref.finalize(self, dataset_registry.release_owner, self.session_token)
+        self.max_output_chars = max_output_chars
+        self.summary_max_rows = summary_max_rows
+        self.summary_max_cols = summary_max_cols
+        self.last_output_stats = None
+        # All uploaded datasets by name; the latest upload is also bound to 'df'
+        self.workspace = Workspace(memory_budget_mb)
+        self._sources = {}
         self.scope = {
             "pd": pd,
             "np": np,
             "plt": plt,
             "sns": sns,
             "st": st,
-            "insights": self.insights
+            "insights": self.insights,
+            "tables": self.workspace,
+            "print": self._summarizing_print
         }
         self.df = None
         self.column_str = ""
         self.latest_figure = None
+        self.approx = None
+        # Embedded columnar engine, connected on the first SQL query
+        self._sql_conn = None
 
+    @traced("engine.load_file")
     def load_file(self, uploaded_file):
         try:
             name = uploaded_file.name
             if name.endswith(('.csv', '.xlsx', '.xls', '.json')):
-                if name.endswith('.csv'):
-                    self.df = pd.read_csv(uploaded_file)
-                elif 'xls' in name:
-                    self.df = pd.read_excel(uploaded_file)
-                elif name.endswith('.json'):
-                    self.df = pd.read_json(uploaded_file)
-
-                self.column_str = ", ".join(list(self.df.columns))
+                table = table_name_from_file(name)
+                # Streamlit hands back the same upload on every rerun; don't re-parse it
+                file_id = getattr(uploaded_file, "file_id", None)
+                if file_id is not None and self._sources.get(table) == file_id:
+                    return f"✅ Data Loaded: '{table}' already in workspace."
+
+                payload = uploaded_file.getvalue()
+                key = content_key(name, payload)
+
+                def parse():
+                    if name.endswith('.csv'):
+                        return pd.read_csv(BytesIO(payload))
+                    elif 'xls' in name:
+                        return pd.read_excel(BytesIO(payload))
+                    return pd.read_json(BytesIO(payload))
+
+                # Identical uploads from any session are parsed once and shared copy-on-write
+                df = self.registry.acquire(key, self.session_token, parse)
+                previous = self._dataset_keys.get(table)
+                try:
+                    self.workspace.add(table, df, pin=True,
+                                       shared=SharedHandle(self.registry, key, self.session_token))
+                except Exception:
+                    if previous != key:
+                        self.registry.release(key, self.session_token)
+                    raise
+
+                # Session state only changes once the workspace has the table
+                if previous is not None and previous != key:
+                    self.registry.release(previous, self.session_token)
+                self._dataset_keys[table] = key
+                self.df = df
+                self._sources[table] = file_id
+                self.column_str = ", ".join(map(str, self.df.columns))
                 self.scope["df"] = self.df
-                return f"✅ Data Loaded: {len(self.df)} rows. Columns: {self.column_str}"
+                self._build_samples()
+                return f"✅ Data Loaded: '{table}' ({len(self.df)} rows). Columns: {self.column_str}"
 
             elif name.endswith(('.txt', '.py', '.md', '.log', '.yaml')):
                 stringio = StringIO(uploaded_file.getvalue().decode("utf-8"))
@@ -52,6 +206,16 @@ class DataEngine:
         except Exception as e:
             return f"❌ Error: {str(e)}"
 
+    def _build_samples(self):
+        """Precomputes uniform and stratified samples for approximate queries."""
+        self.approx = ApproxQuery(self.df)
+        self.scope["df_sample"] = self.approx.sample
+        self.scope["approx"] = self.approx
+
+    @property
+    def sampling_active(self):
+        return self.approx is not None and len(self.df) >= SAMPLE_MIN_ROWS
+
     def _heal_code(self, code: str) -> str:
         if self.df is None: return code
 
@@ -75,10 +239,29 @@ class DataEngine:
         healed_code = re.sub(pattern, replace_match, code)
         return healed_code
 
+    def _summarizing_print(self, *args, **kwargs):
+        """print() for the sandbox: large frames are summarized before they hit stdout."""
+        args = [summarize_frame(a, self.summary_max_rows, self.summary_max_cols) for a in args]
+        builtins.print(*args, **kwargs)
+
+    def _finish_output(self, capture, result, marker):
+        """Formats the agent response and records captured vs. sent sizes."""
+        if capture.truncated:
+            result += (f"\n[OUTPUT TRUNCATED: {capture.bytes_written:,} bytes captured, "
+                       f"{len(result.encode('utf-8', 'replace')):,} sent]")
+        response = f"Output:\n{result}\n{marker}"
+        self.last_output_stats = {
+            "captured_bytes": capture.bytes_written,
+            "sent_bytes": len(response.encode("utf-8", "replace")),
+            "truncated": capture.truncated,
+        }
+        return response
+
+    @traced("engine.run_python_analysis")
     def run_python_analysis(self, code: str):
         code = self._heal_code(code)
         old_stdout = sys.stdout
-        redirected_output = sys.stdout = StringIO()
+        redirected_output = sys.stdout = BoundedOutput(self.max_output_chars)
 
         try:
             plt.close('all')
@@ -95,16 +278,76 @@ class DataEngine:
                 ax = plt.gca()
                 if len(ax.lines) > 0 or len(ax.patches) > 0 or len(ax.collections) > 0 or len(ax.images) > 0:
                     self.latest_figure = plt.gcf()
-                    return f"Output:\n{result}\n[CHART GENERATED]"
+                    return self._finish_output(redirected_output, result, "[CHART GENERATED]")
                 else:
                     plt.close()
 
             if result and len(result.strip()) > 0:
-                return f"Output:\n{result}\n[ANALYSIS COMPLETE]"
+                return self._finish_output(redirected_output, result, "[ANALYSIS COMPLETE]")
 
             return "❌ Error: Code ran but printed nothing. Use print() or plt.plot()."
 
         except Exception as e:
             return f"❌ Execution Error: {str(e)}"
         finally:
-            sys.stdout = old_stdout
\ No newline at end of file
+            sys.stdout = old_stdout
+
+    @property
+    def sql_conn(self):
+        """DuckDB connection; scans the pandas frames in scope without copying."""
+        if self._sql_conn is None:
+            import duckdb
+            self._sql_conn = duckdb.connect(database=":memory:")
+        return self._sql_conn
+
+    def _register_sql_tables(self):
+        """Exposes workspace tables and DataFrames in the sandbox scope as SQL views."""
+        # Every view goes through create_view(replace=True): a table moves between memory
+        # and disk, and mixing register() with SQL-created views makes the names collide
+        tables = []
+        for name in self.workspace.names():
+            if self.workspace.is_resident(name):
+                relation = self.sql_conn.from_df(self.workspace.peek(name))
+            else:
+                # Spilled tables are scanned straight from Parquet, no reload needed
+                relation = self.sql_conn.read_parquet(self.workspace.spill_path(name))
+            relation.create_view(name, replace=True)
+            tables.append(name)
+        for name, value in self.scope.items():
+            if isinstance(value, pd.DataFrame) and name.isidentifier():
+                self.sql_conn.from_df(value).create_view(name, replace=True)
+                tables.append(name)
+        return tables
+
+    @traced("engine.run_sql_analysis")
+    def run_sql_analysis(self, query: str):
+        try:
+            tables = self._register_sql_tables()
+            if not tables:
+                return "❌ Error: No tables loaded. Upload a dataset or create a DataFrame first."
+
+            relation = self.sql_conn.sql(query)
+            if relation is None:
+                return "Output:\nStatement executed.\n[ANALYSIS COMPLETE]"
+
+            # Fetch one extra row to detect truncation without materializing everything
+            result = relation.limit(SQL_MAX_ROWS + 1).df()
+            truncated = len(result) > SQL_MAX_ROWS
+            result = result.head(SQL_MAX_ROWS)
+            self.scope["sql_result"] = result
+
+            if result.empty:
+                return "Output:\nQuery returned no rows.\n[ANALYSIS COMPLETE]"
+
+            # Wide results are cut to the summary column limit, then to the same character cap as Python output
+            capture = BoundedOutput(self.max_output_chars)
+            capture.write(result.iloc[:, :self.summary_max_cols].to_string(index=False))
+            if truncated:
+                capture.write(f"\n... (showing first {SQL_MAX_ROWS} rows; aggregate or add LIMIT for fewer)")
+            if len(result.columns) > self.summary_max_cols:
+                capture.write(f"\n... (showing first {self.summary_max_cols} of {len(result.columns)} columns; "
+                              f"select the columns you need)")
+            return self._finish_output(capture, capture.getvalue(), "[ANALYSIS COMPLETE]")
+
+        except Exception as e:
+            return f"❌ Execution Error: {str(e)}"
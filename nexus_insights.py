@@ -1,9 +1,36 @@
+import os
+import math
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.ensemble import IsolationForest
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
+from concurrent.futures import ProcessPoolExecutor
+
+# sklearn, statsmodels and seaborn are imported inside the methods that use
+# them: together they add seconds to cold start and most turns never need them.
+
+# Groups shorter than this are skipped (same floor as forecast_series)
+MIN_FORECAST_POINTS = 10
+# Below this many groups a process pool costs more than it saves
+MIN_PARALLEL_GROUPS = 4
+# Grouped forecasts plot at most this many panels (the largest groups by volume)
+MAX_FORECAST_PANELS = 12
+# Correlation drivers run on a random sample above this many rows
+CORR_SAMPLE_ROWS = 200_000
+# How many datasets keep a cached standardized matrix at once, and their total size;
+# a matrix bigger than the byte cap on its own is recomputed instead of cached
+CORR_CACHE_SIZE = 4
+CORR_CACHE_MB = 512
+# Bars drawn in the drivers chart (strongest by absolute score)
+MAX_DRIVERS_PLOTTED = 15
+# Fitted group forecasts kept per session (each is only `periods` values)
+FORECAST_CACHE_SIZE = 1024
+
+
+def _fit_group_forecast(series, periods):
+    """Fits one Holt-Winters model. Module-level so the process pool can pickle it."""
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    model = ExponentialSmoothing(series, seasonal_periods=None, trend='add', seasonal=None).fit()
+    return model.forecast(periods)
 
 
 class InsightModule:
@@ -13,9 +40,14 @@ class InsightModule:
     """
 
     def __init__(self):
-        pass
+        # Fitted forecasts keyed by (group-data hash, periods)
+        self._forecast_cache = {}
+        # Standardized numeric matrices keyed by (dataset hash, method)
+        self._corr_cache = {}
 
     def check_anomalies(self, df, column_name, contamination=0.05):
+        from sklearn.ensemble import IsolationForest
+
         # Prep Data
         data = df[[column_name]].dropna()
 
@@ -42,6 +74,8 @@ class InsightModule:
             print("- No significant anomalies detected.")
 
     def forecast_series(self, df, date_col, value_col, periods=30):
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
         # Prep Data
         temp_df = df.copy()
         temp_df[date_col] = pd.to_datetime(temp_df[date_col])
@@ -73,29 +107,232 @@ class InsightModule:
         except Exception as e:
             print(f"❌ Forecasting Error: {str(e)}")
 
-    def get_correlation_drivers(self, df, target_col):
+    def forecast_many(self, df, date_col, value_col, group_col, periods=30, max_workers=None):
+        # Prep Data: one sorted, date-indexed series per group
+        temp_df = df[[group_col, date_col, value_col]].copy()
+        temp_df[date_col] = pd.to_datetime(temp_df[date_col])
+        temp_df = temp_df.sort_values(by=date_col)
+
+        histories, keys, skipped = {}, {}, []
+        for group, part in temp_df.groupby(group_col, sort=True):
+            series = part.set_index(date_col)[value_col].dropna()
+            if len(series) < MIN_FORECAST_POINTS:
+                skipped.append(group)
+                continue
+            histories[group] = series
+            data_hash = int(pd.util.hash_pandas_object(series, index=True).sum())
+            keys[group] = (data_hash, periods)
+
+        # Train Models (only groups not already in the cache)
+        forecasts, failed = {}, []
+        pending = [g for g in histories if keys[g] not in self._forecast_cache]
+        for g in histories:
+            if keys[g] in self._forecast_cache:
+                forecasts[g] = self._forecast_cache[keys[g]]
+
+        if len(pending) >= MIN_PARALLEL_GROUPS:
+            workers = min(max_workers or os.cpu_count() or 1, len(pending))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {g: pool.submit(_fit_group_forecast, histories[g], periods) for g in pending}
+                results = {}
+                for g, future in futures.items():
+                    try:
+                        results[g] = future.result()
+                    except Exception:
+                        failed.append(g)
+        else:
+            results = {}
+            for g in pending:
+                try:
+                    results[g] = _fit_group_forecast(histories[g], periods)
+                except Exception:
+                    failed.append(g)
+
+        for g, forecast in results.items():
+            if len(self._forecast_cache) >= FORECAST_CACHE_SIZE:
+                self._forecast_cache.pop(next(iter(self._forecast_cache)))
+            self._forecast_cache[keys[g]] = forecast
+            forecasts[g] = forecast
+
+        if not histories:
+            print(f"❌ No group has enough data points to forecast (Need at least {MIN_FORECAST_POINTS}).")
+            return None
+        if not forecasts:
+            print(f"❌ Forecasting Error: the model failed to fit for every group ({', '.join(map(str, failed))}).")
+            return None
+
+        # Tidy frame: one row per (group, date)
+        frames = []
+        for g, forecast in forecasts.items():
+            frames.append(pd.DataFrame({
+                group_col: g,
+                date_col: forecast.index,
+                "forecast": forecast.values,
+            }))
+        result = pd.concat(frames, ignore_index=True)
+
+        # Plot: small multiples for the largest groups only; hundreds of panels are unreadable and slow
+        groups = sorted(forecasts, key=lambda g: histories[g].abs().sum(), reverse=True)[:MAX_FORECAST_PANELS]
+        omitted = len(forecasts) - len(groups)
+        ncols = min(3, len(groups))
+        nrows = math.ceil(len(groups) / ncols)
+        fig, axes = plt.subplots(nrows, ncols, figsize=(5 * ncols, 3 * nrows), squeeze=False)
+        for ax, g in zip(axes.flat, groups):
+            ax.plot(histories[g].index, histories[g], label='Historical')
+            ax.plot(forecasts[g].index, forecasts[g], color='green', linestyle='--', label='Forecast')
+            ax.set_title(str(g))
+            ax.tick_params(axis='x', labelrotation=45)
+        # Remove (not hide) unused cells: the sandbox checks plt.gca() for drawn content
+        for ax in axes.flat[len(groups):]:
+            fig.delaxes(ax)
+        fig.suptitle(f"Forecast: {value_col} by {group_col} ({periods} steps)")
+        fig.tight_layout()
+
+        # PRINT THE INSIGHT
+        print(f"### 📈 Grouped Forecast Report: {value_col} by {group_col}")
+        print(f"- **Groups Forecast:** {len(forecasts)} (reused from cache: {len(forecasts) - len(results)})")
+        if skipped:
+            print(f"- **Skipped (fewer than {MIN_FORECAST_POINTS} points):** {', '.join(map(str, skipped))}")
+        if failed:
+            print(f"- **Failed to fit:** {', '.join(map(str, failed))}")
+        print("- **Visual:** Each panel shows one group; the GREEN dotted line is the forecast.")
+        if omitted:
+            print(f"- **Not plotted:** {omitted} smaller groups (chart shows the top {len(groups)} by total {value_col}; "
+                  f"all groups are in the returned frame).")
+        return result
+
+    def _standardized_matrix(self, numeric_df, method):
+        """Returns (columns, Z, mask) for a numeric frame, reusing the per-dataset cache.
+
+        Z holds each column centred and scaled over its non-null rows, with NaNs
+        (and every entry of a constant column) replaced by 0; mask marks which
+        entries were present.
+        """
+        key = (int(pd.util.hash_pandas_object(numeric_df, index=False).sum()),
+               tuple(numeric_df.columns), method)
+        if key in self._corr_cache:
+            return self._corr_cache[key]
+
+        values = numeric_df.rank() if method == "spearman" else numeric_df
+        # Standardized in place on a private copy: no n x k temporaries
+        Z = values.to_numpy(dtype=float, copy=True)
+        mask = ~np.isnan(Z)
+        # Compare extremes rather than std: rounding gives constant columns a tiny nonzero std
+        varies = (values.max() > values.min()).to_numpy()
+        std = np.nanstd(Z, axis=0)
+        std[~varies] = 1.0
+        Z -= np.nanmean(Z, axis=0)
+        Z /= std
+        Z[~mask] = 0.0
+        Z[:, ~varies] = 0.0
+
+        entry = (list(numeric_df.columns), Z, mask)
+        nbytes = Z.nbytes + mask.nbytes
+        cap = CORR_CACHE_MB * 1024 * 1024
+        if nbytes > cap:
+            return entry
+        while self._corr_cache and (len(self._corr_cache) >= CORR_CACHE_SIZE or
+                                    nbytes + sum(e[1].nbytes + e[2].nbytes for e in self._corr_cache.values()) > cap):
+            self._corr_cache.pop(next(iter(self._corr_cache)))
+        self._corr_cache[key] = entry
+        return entry
+
+    @staticmethod
+    def _target_correlations(Z, mask, target_idx):
+        """Pairwise-complete Pearson r of every column against one column, in O(n*k).
+
+        Constant columns (all zeros in Z) come out as NaN, like pandas.
+        """
+        present = mask[:, target_idx]
+        if not present.all():
+            # Only rows where the target is present count
+            Z, mask = Z[present], mask[present]
+        y = Z[:, target_idx]
+        if mask.all():
+            n = np.full(Z.shape[1], Z.shape[0], dtype=float)
+            sy, syy = y.sum(), y @ y
+        else:
+            # ...and, per column, only rows where that column is present (missing Z entries are 0)
+            n = mask.sum(axis=0).astype(float)
+            sy, syy = np.einsum('ij,i->j', mask, y), np.einsum('ij,i->j', mask, y * y)
+        sx = Z.sum(axis=0)
+        sxx = np.einsum('ij,ij->j', Z, Z)
+        sxy = Z.T @ y
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        return np.clip(r, -1.0, 1.0), n
+
+    def get_correlation_drivers(self, df, target_col, method="pearson", max_rows=CORR_SAMPLE_ROWS):
+        import seaborn as sns
+
         numeric_df = df.select_dtypes(include=['number'])
         if target_col not in numeric_df.columns:
             print(f"❌ Target column '{target_col}' must be numeric.")
             return
+        if method not in ("pearson", "spearman", "mutual_info"):
+            print(f"❌ Unknown method '{method}'. Use 'pearson', 'spearman' or 'mutual_info'.")
+            return
+
+        # Sample huge tables; correlations converge long before n does
+        total_rows = len(numeric_df)
+        sampled = total_rows > max_rows
+        if sampled:
+            numeric_df = numeric_df.sample(n=max_rows, random_state=42)
+
+        if method == "mutual_info":
+            from sklearn.feature_selection import mutual_info_regression
+            data = numeric_df.replace([np.inf, -np.inf], np.nan).dropna(subset=[target_col])
+            features = data.drop(columns=[target_col])
+            # All-NaN and constant columns carry no information (and NaNs would survive the fill)
+            features = features.loc[:, features.nunique() > 1]
+            if features.empty:
+                print(f"❌ No other numeric column varies alongside '{target_col}'.")
+                return
+            features = features.fillna(features.median())
+            scores = mutual_info_regression(features, data[target_col], random_state=42)
+            corr = pd.Series(scores, index=features.columns)
+            pair_n = pd.Series(float(len(data)), index=features.columns)
+        else:
+            columns, Z, mask = self._standardized_matrix(numeric_df, method)
+            r, n = self._target_correlations(Z, mask, columns.index(target_col))
+            corr = pd.Series(r, index=columns)
+            pair_n = pd.Series(n, index=columns)
 
-        corr = numeric_df.corr()[target_col].sort_values(ascending=False).drop(target_col)
+        corr = corr.drop(target_col, errors='ignore').dropna().sort_values(ascending=False)
+        if corr.empty:
+            print(f"❌ No other numeric column varies alongside '{target_col}'.")
+            return
         top_driver = corr.index[0]
         top_score = corr.iloc[0]
+        label = {"pearson": "Correlation", "spearman": "Spearman ρ", "mutual_info": "Mutual Info"}[method]
 
-        # Plot
+        # Plot: the strongest drivers only; a bar per column dominates the turn on wide tables
+        shown = corr[corr.abs().nlargest(MAX_DRIVERS_PLOTTED).index].sort_values(ascending=False)
         plt.figure(figsize=(8, 5))
-        sns.barplot(x=corr.values, y=corr.index, palette="coolwarm")
-        plt.title(f"Correlation Drivers for '{target_col}'")
+        sns.barplot(x=shown.values, y=shown.index, palette="coolwarm")
+        plt.title(f"{label} Drivers for '{target_col}'")
         plt.axvline(0, color='black', linewidth=1)
 
         # PRINT THE INSIGHT
         print(f"### 🎯 Key Drivers for '{target_col}'")
-        print(f"- **Top Driver:** {top_driver} (Correlation: {top_score:.2f})")
+        print(f"- **Top Driver:** {top_driver} ({label}: {top_score:.2f})")
+        if len(corr) > len(shown):
+            print(f"- **Chart:** strongest {len(shown)} of {len(corr)} columns.")
+        if sampled and method != "mutual_info":
+            # 95% interval on r via the Fisher z-transform
+            z_err = 1.96 / np.sqrt(max(pair_n[top_driver] - 3, 1))
+            low, high = np.tanh(np.arctanh(top_score) - z_err), np.tanh(np.arctanh(top_score) + z_err)
+            print(f"- **Sampled:** {len(numeric_df):,} of {total_rows:,} rows "
+                  f"(95% interval for top driver: {low:.2f} to {high:.2f}).")
+        elif sampled:
+            print(f"- **Sampled:** {len(numeric_df):,} of {total_rows:,} rows.")
+        if method == "mutual_info":
+            print("- **Interpretation:** Higher scores mean more shared information (0 = independent).")
+            return
         print("- **Interpretation:**")
         if top_score > 0.5:
             print(f"  - Strong positive relationship.")
         elif top_score < -0.5:
             print(f"  - Strong negative relationship.")
         else:
-            print("  - Relationships are moderate.")
\ No newline at end of file
+            print("  - Relationships are moderate.")
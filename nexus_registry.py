@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+import pandas as pd
+
+# Process-wide cap for parsed datasets; unreferenced ones are evicted past it
+DEFAULT_REGISTRY_CAP_MB = 4096
+
+# Shared frames rely on copy-on-write so one session's edits never leak into another's.
+# It is always on from pandas 3; earlier versions need the option.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def content_key(filename, payload):
+    """Identity of an upload: its bytes plus the extension that decides how it is parsed."""
+    ext = filename.rsplit(".", 1)[-1].lower()
+    return f"{ext}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
+class DatasetRegistry:
+    """
+    Parsed datasets shared by every session in the process, keyed by content hash.
+    Sessions get shallow copies (copy-on-write views) and hold a reference
+    until they release it; unreferenced datasets are evicted LRU past the cap.
+    """
+
+    def __init__(self, cap_mb=DEFAULT_REGISTRY_CAP_MB):
+        self.cap_bytes = int(cap_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        # key -> {"df", "nbytes", "owners", "last_used"}
+        self._entries = {}
+
+    def acquire(self, key, owner, loader):
+        """
+        Returns a private copy-on-write view of the dataset for `key`, parsing it
+        with loader() only if no session has it yet. `owner` is any hashable
+        session token; it keeps the dataset alive until released.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Per-key lock: 30 sessions uploading the same file parse it once
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._checkout(entry, owner)
+
+            df = loader()
+            nbytes = int(df.memory_usage(deep=True).sum())
+            with self._lock:
+                entry = self._entries[key] = {"df": df, "nbytes": nbytes, "owners": set(), "last_used": 0.0}
+                view = self._checkout(entry, owner)
+                self._evict()
+                return view
+
+    def _checkout(self, entry, owner):
+        # Caller holds self._lock
+        entry["owners"].add(owner)
+        entry["last_used"] = time.monotonic()
+        return entry["df"].copy(deep=False)
+
+    def release(self, key, owner):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry["owners"].discard(owner)
+                self._evict()
+
+    def release_owner(self, owner):
+        """Drops every reference a session holds; call when the session ends."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["owners"].discard(owner)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock. Datasets still referenced by a session are never evicted.
+        held = sum(e["nbytes"] for e in self._entries.values())
+        idle = sorted((e["last_used"], k) for k, e in self._entries.items() if not e["owners"])
+        for _, key in idle:
+            if held <= self.cap_bytes:
+                break
+            held -= self._entries.pop(key)["nbytes"]
+            self._key_locks.pop(key, None)
+
+    def stats(self):
+        """Datasets held, bytes held, and bytes saved versus one private copy per session."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "datasets": len(entries),
+            "sessions": sum(len(e["owners"]) for e in entries),
+            "bytes_held": sum(e["nbytes"] for e in entries),
+            "bytes_saved": sum(e["nbytes"] * max(len(e["owners"]) - 1, 0) for e in entries),
+        }
+
+
+class SharedHandle:
+    """One session's reference to a registry dataset that it can drop and take back."""
+
+    def __init__(self, registry, key, owner):
+        self.registry = registry
+        self.key = key
+        self.owner = owner
+
+    def acquire(self, loader):
+        """Re-takes the reference; loader() runs only if the dataset was evicted meanwhile."""
+        return self.registry.acquire(self.key, self.owner, loader)
+
+    def release(self):
+        self.registry.release(self.key, self.owner)
+
+
+registry = DatasetRegistry()
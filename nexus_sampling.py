@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# Datasets smaller than this are cheap enough to query exactly
+SAMPLE_MIN_ROWS = 50_000
+# Rows kept in each precomputed sample
+SAMPLE_SIZE = 10_000
+# A column qualifies as a stratum key if it has at most this many values
+MAX_STRATA = 50
+# z-score for the reported 95% confidence intervals
+Z_95 = 1.96
+
+
+def reservoir_sample(df, k=SAMPLE_SIZE, seed=42):
+    """Uniform sample of k rows via bottom-k random keys.
+
+    Equivalent to a classic reservoir, but vectorized: every row draws a key
+    and the k smallest keys win, so chunks can be merged by keeping the k
+    smallest keys across them.
+    """
+    if len(df) <= k:
+        return df
+    keys = np.random.default_rng(seed).random(len(df))
+    keep = np.sort(np.argpartition(keys, k)[:k])
+    return df.iloc[keep]
+
+
+def pick_strata_column(df):
+    """Lowest-cardinality categorical column usable as a stratum key, or None."""
+    best, best_card = None, None
+    for col in df.select_dtypes(include=['object', 'category', 'bool', 'string']).columns:
+        card = df[col].nunique(dropna=False)
+        if 1 < card <= MAX_STRATA and (best_card is None or card < best_card):
+            best, best_card = col, card
+    return best
+
+
+def stratified_sample(df, strata_col, k=SAMPLE_SIZE, min_per_stratum=30, seed=42):
+    """Proportional stratified sample with a floor per stratum.
+
+    Adds a '_weight' column (stratum rows / sampled rows) so estimates can be
+    scaled back to the full population.
+    """
+    groups = df.groupby(strata_col, dropna=False, observed=True)
+    sizes = groups.size()
+    alloc = np.maximum(np.round(sizes / sizes.sum() * k), min_per_stratum)
+    alloc = np.minimum(alloc, sizes).astype(int)
+
+    parts = []
+    for key, part in groups:
+        take = alloc[key]
+        chosen = part.sample(n=take, random_state=seed) if take < len(part) else part
+        parts.append(chosen.assign(_weight=len(part) / take))
+    return pd.concat(parts)
+
+
+class ApproxQuery:
+    """
+    Approximate aggregates over precomputed samples, with 95% error bounds.
+    Every method returns a DataFrame with estimate, ci_low, ci_high, n_sample.
+    """
+
+    def __init__(self, df):
+        self.population = len(df)
+        self.sample = reservoir_sample(df)
+        self.strata_col = pick_strata_column(df)
+        self.strata = stratified_sample(df, self.strata_col) if self.strata_col else None
+        self.exact = len(self.sample) == self.population
+
+    def describe(self):
+        strata = f", stratified by '{self.strata_col}'" if self.strata_col else ""
+        return f"{len(self.sample):,} of {self.population:,} rows{strata}"
+
+    @staticmethod
+    def _frame(estimate, half_width, n):
+        return pd.DataFrame({
+            "estimate": estimate,
+            "ci_low": estimate - half_width,
+            "ci_high": estimate + half_width,
+            "n_sample": n,
+        })
+
+    def _fpc(self, n, population):
+        """Finite population correction; shrinks the bound to 0 when n == population."""
+        return np.sqrt(np.clip(1 - n / population, 0, 1))
+
+    def _mean_stats(self, col, by, fill=None):
+        """Per-group mean, std and n of `col`; nulls are dropped, or replaced by `fill` if given."""
+        if by is None:
+            values = self.sample[col]
+            values = values.dropna() if fill is None else values.fillna(fill)
+            stats = pd.DataFrame({"mean": [values.mean()], "std": [values.std()], "n": [len(values)]},
+                                 index=[col])
+            stats["population"] = self.population
+            return stats
+        # Per-group estimates come from the stratified sample when it matches
+        source = self.strata if by == self.strata_col else self.sample
+        values = source[col] if fill is None else source[col].fillna(fill)
+        stats = values.groupby(source[by], observed=True).agg(["mean", "std", "count"])
+        stats = stats.rename(columns={"count": "n"})
+        # Population rows per group count nulls too
+        rows = source.groupby(by, observed=True).size()
+        if by == self.strata_col:
+            stats["population"] = source.groupby(by, observed=True)["_weight"].first() * rows
+        else:
+            stats["population"] = rows * self.population / len(self.sample)
+        return stats
+
+    def mean(self, col, by=None):
+        stats = self._mean_stats(col, by)
+        se = stats["std"].fillna(0) / np.sqrt(stats["n"]) * self._fpc(stats["n"], stats["population"])
+        return self._frame(stats["mean"], Z_95 * se, stats["n"])
+
+    def _domain_sums(self, col, by):
+        """
+        Per-group totals from the uniform sample, for a `by` that isn't the strata key.
+        Each group's total is N * mean(y * 1[row in group]) over every sampled row,
+        so the interval also covers the uncertainty in how many rows the group has.
+        """
+        n, population = len(self.sample), self.population
+        values = self.sample[col].fillna(0)
+        keys = self.sample[by]
+        s1 = values.groupby(keys, observed=True).sum()
+        s2 = (values ** 2).groupby(keys, observed=True).sum()
+        mean = s1 / n
+        var = (s2 - n * mean ** 2).clip(lower=0) / max(n - 1, 1)
+        se = np.sqrt(var / n) * self._fpc(n, population)
+        return self._frame(mean * population, Z_95 * se * population, keys.groupby(keys, observed=True).size())
+
+    def sum(self, col, by=None):
+        if by is not None and by != self.strata_col:
+            return self._domain_sums(col, by)
+        # Nulls add nothing to a total, so they count as 0 rather than being dropped;
+        # scaling the non-null mean by every row would overstate sums on sparse columns
+        stats = self._mean_stats(col, by, fill=0)
+        se = stats["std"].fillna(0) / np.sqrt(stats["n"]) * self._fpc(stats["n"], stats["population"])
+        return self._frame(stats["mean"] * stats["population"], Z_95 * se * stats["population"], stats["n"])
+
+    def count(self, condition=None):
+        """Estimated rows matching a DataFrame.query() string (all rows if None)."""
+        n = len(self.sample)
+        if condition is None:
+            return self._frame(pd.Series([float(self.population)], index=["count"]), 0.0, n)
+        p = len(self.sample.query(condition)) / n
+        se = np.sqrt(p * (1 - p) / n) * self._fpc(n, self.population)
+        return self._frame(pd.Series([p * self.population], index=[condition]),
+                           Z_95 * se * self.population, n)
+
+    def proportion(self, condition):
+        """Estimated share of rows matching a DataFrame.query() string."""
+        n = len(self.sample)
+        p = len(self.sample.query(condition)) / n
+        se = np.sqrt(p * (1 - p) / n) * self._fpc(n, self.population)
+        return self._frame(pd.Series([p], index=[condition]), Z_95 * se, n)
@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+import functools
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Recent durations kept per series for percentiles
+WINDOW_SIZE = 1024
+# Distinct (span, tags) series kept before the least recently recorded is dropped
+MAX_SERIES = 2000
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_METRICS_PORT = 9464
+
+# Tags that apply to every span in the current turn (session, model, key...)
+_context_tags = contextvars.ContextVar("nexus_trace_tags", default={})
+
+
+class _Series:
+    __slots__ = ("window", "count", "total", "errors")
+
+    def __init__(self):
+        self.window = deque(maxlen=WINDOW_SIZE)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+
+class Telemetry:
+    """
+    Process-wide span recorder. Cheap enough to leave on: one perf_counter
+    pair, a lock and a deque append per span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = OrderedDict()
+
+    def record(self, name, seconds, error=False, **tags):
+        tags = {**_context_tags.get(), **tags}
+        key = (name, tuple(sorted((k, str(v)) for k, v in tags.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Least recently recorded goes first, so busy series keep their counters
+                if len(self._series) >= MAX_SERIES:
+                    self._series.popitem(last=False)
+                series = self._series[key] = _Series()
+            else:
+                self._series.move_to_end(key)
+            series.window.append(seconds)
+            series.count += 1
+            series.total += seconds
+            series.errors += int(error)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    # --- EXPORT ---
+    def snapshot(self, by=("span",), **filters):
+        """
+        Aggregated stats as a list of dicts, grouped by the given tag names
+        ('span' is the span name). Keyword filters keep only matching tags.
+        """
+        groups = {}
+        with self._lock:
+            items = [(k, list(s.window), s.count, s.total, s.errors) for k, s in self._series.items()]
+        for (name, tags), window, count, total, errors in items:
+            tags = dict(tags, span=name)
+            if any(tags.get(k) != str(v) for k, v in filters.items()):
+                continue
+            group_key = tuple(tags.get(k, "") for k in by)
+            g = groups.setdefault(group_key, {"window": [], "count": 0, "total": 0.0, "errors": 0})
+            g["window"].extend(window)
+            g["count"] += count
+            g["total"] += total
+            g["errors"] += errors
+
+        rows = []
+        for group_key, g in sorted(groups.items()):
+            window = sorted(g["window"])
+            row = dict(zip(by, group_key))
+            row.update({"count": g["count"], "errors": g["errors"], "total_s": round(g["total"], 4)})
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = round(_quantile(window, q) * 1000, 2)
+            rows.append(row)
+        return rows
+
+    def to_json(self):
+        with self._lock:
+            keys = list(self._series)
+        by = ("span",) + tuple(sorted({k for _, tags in keys for k, _ in tags}))
+        return json.dumps(self.snapshot(by=by), indent=2)
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP nexus_span_seconds Duration of traced operations.",
+            "# TYPE nexus_span_seconds summary",
+        ]
+        error_lines = [
+            "# HELP nexus_span_errors_total Traced operations that raised.",
+            "# TYPE nexus_span_errors_total counter",
+        ]
+        with self._lock:
+            items = [(k, sorted(s.window), s.count, s.total, s.errors) for k, s in self._series.items()]
+        for (name, tags), window, count, total, errors in items:
+            labels = [f'span="{_escape(name)}"'] + [f'{k}="{_escape(v)}"' for k, v in tags]
+            base = ",".join(labels)
+            for q in QUANTILES:
+                lines.append(f'nexus_span_seconds{{{base},quantile="{q}"}} {_quantile(window, q):.6f}')
+            lines.append(f"nexus_span_seconds_count{{{base}}} {count}")
+            lines.append(f"nexus_span_seconds_sum{{{base}}} {total:.6f}")
+            error_lines.append(f"nexus_span_errors_total{{{base}}} {errors}")
+        return "\n".join(lines + error_lines) + "\n"
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+telemetry = Telemetry()
+
+
+# --- INSTRUMENTATION HELPERS ---
+@contextmanager
+def span(name, **tags):
+    """Times the enclosed block and records it under `name` with the current context tags."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        telemetry.record(name, time.perf_counter() - start, error=error, **tags)
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_context(**tags):
+    """Sets tags (e.g. session=...) applied to every span until the next call."""
+    _context_tags.set({k: v for k, v in tags.items() if v is not None})
+
+
+@contextmanager
+def context(**tags):
+    """Adds tags for the duration of a block."""
+    token = _context_tags.set({**_context_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _context_tags.reset(token)
+
+
+# --- METRICS ENDPOINT ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, ctype = telemetry.to_json(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, ctype = telemetry.to_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+    """Serves /metrics (Prometheus text) and /metrics.json on a daemon thread."""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrics Server Warning: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name="nexus-metrics").start()
+    return server
@@ -0,0 +1,163 @@
+import os
+import re
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+import pandas as pd
+
+# Default per-session budget for in-memory datasets
+DEFAULT_MEMORY_BUDGET_MB = 1024
+# DuckDB reserved words; a table named after one would need quoting in every query
+SQL_RESERVED_WORDS = frozenset("""
+    all analyse analyze and any array as asc asymmetric both case cast check collate column
+    constraint create default deferrable desc describe distinct do else end except false fetch
+    for foreign from group having in initially intersect into lambda lateral leading limit not
+    null offset on only or order pivot pivot_longer pivot_wider placing primary qualify
+    references returning select show some summarize symmetric table then to trailing true union
+    unique unpivot using variadic when where window with
+""".split())
+
+
+def table_name_from_file(filename):
+    """Turns 'Sales 2024.csv' into a SQL/Python friendly name like 'sales_2024'."""
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    name = re.sub(r"\W+", "_", stem).strip("_") or "data"
+    return f"t_{name}" if name[0].isdigit() or name in SQL_RESERVED_WORDS else name
+
+
+class Workspace:
+    """
+    Named datasets for one session, kept under a memory budget.
+    The least recently used datasets spill to Parquet and reload on access.
+    Datasets shared through the registry also give up their reference when
+    they spill, and reload from the registry while it still holds them.
+    Access from the sandbox via tables["name"] or tables.name.
+    """
+
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.spill_dir = tempfile.mkdtemp(prefix="nexus_spill_")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+        # name -> {"df", "path", "shared", "spillable", "rows", "cols", "nbytes"}; order = recency
+        self._tables = OrderedDict()
+        self.pinned = None
+
+    # --- DATASET ACCESS ---
+    def add(self, name, df, pin=False, shared=None):
+        """
+        Stores a dataset, replacing any existing one with that name, and returns its name.
+        `shared` is the SharedHandle when df is a view of a registry dataset.
+        """
+        self._drop_spill(name)
+        self._tables[name] = {
+            "df": df,
+            "path": None,
+            "shared": shared,
+            "spillable": True,
+            "rows": len(df),
+            "cols": len(df.columns),
+            "nbytes": int(df.memory_usage(deep=True).sum()),
+        }
+        self._tables.move_to_end(name)
+        if pin:
+            self.pinned = name
+        self._enforce_budget()
+        return name
+
+    def get(self, name):
+        if name not in self._tables:
+            raise KeyError(f"No table named '{name}'. Available: {', '.join(self._tables) or 'none'}")
+        entry = self._tables[name]
+        self._tables.move_to_end(name)
+        if entry["df"] is None:
+            path = entry["path"]
+            if entry["shared"] is not None:
+                # Another session may still hold it; Parquet is only the fallback
+                entry["df"] = entry["shared"].acquire(lambda: pd.read_parquet(path))
+            else:
+                entry["df"] = pd.read_parquet(path)
+            self._drop_file(entry)
+            self._enforce_budget()
+        return entry["df"]
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError as e:
+            raise AttributeError(str(e)) from None
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def __len__(self):
+        return len(self._tables)
+
+    def names(self):
+        return list(self._tables)
+
+    def peek(self, name):
+        """In-memory frame without touching recency (None if spilled)."""
+        return self._tables[name]["df"]
+
+    def is_resident(self, name):
+        return self._tables[name]["df"] is not None
+
+    def spill_path(self, name):
+        """Parquet file of a spilled dataset (None while it is only in memory)."""
+        return self._tables[name]["path"]
+
+    # --- MEMORY BUDGET ---
+    def memory_used(self):
+        return sum(e["nbytes"] for e in self._tables.values() if e["df"] is not None)
+
+    def _enforce_budget(self):
+        # Oldest first; the pinned (active) dataset and the newest one always stay
+        for name in list(self._tables)[:-1]:
+            if self.memory_used() <= self.memory_budget:
+                break
+            entry = self._tables[name]
+            if name != self.pinned and entry["df"] is not None and entry["spillable"]:
+                self._spill(name)
+
+    def _spill(self, name):
+        entry = self._tables[name]
+        entry["path"] = os.path.join(self.spill_dir, f"{name}.parquet")
+        try:
+            # Parquet needs string column labels
+            entry["df"].rename(columns=str).to_parquet(entry["path"])
+        except Exception as e:
+            # e.g. object columns mixing numbers and text; keep it in memory rather than fail the caller
+            self._drop_file(entry)
+            entry["spillable"] = False
+            print(f"Workspace Warning: '{name}' stays in memory, it can't be written to Parquet ({e})")
+            return
+        entry["df"] = None
+        if entry["shared"] is not None:
+            # Dropping the view alone frees nothing while the registry holds the frame
+            entry["shared"].release()
+
+    def _drop_spill(self, name):
+        entry = self._tables.pop(name, None)
+        if entry:
+            self._drop_file(entry)
+
+    @staticmethod
+    def _drop_file(entry):
+        if entry["path"] and os.path.exists(entry["path"]):
+            os.remove(entry["path"])
+        entry["path"] = None
+
+    # --- PROMPT CONTEXT ---
+    def summary(self):
+        """One compact line per table for the system prompt."""
+        parts = []
+        for name, e in self._tables.items():
+            where = "active as df" if name == self.pinned else ("in memory" if e["df"] is not None else "on disk")
+            parts.append(f"{name} ({e['rows']:,}x{e['cols']}, {where})")
+        return "; ".join(parts)
@@ -0,0 +1,43 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from run_benchmarks import compare, make_dataset
+
+
+def test_compare_flags_only_real_regressions():
+    """Slower-than-threshold benchmarks fail; noise-level and new benchmarks don't."""
+    baseline = {"load_file.csv[10000x5]": 0.100, "engine._heal_code[10000x5]": 0.0002,
+                "report.generate_pdf[200 msgs]": 0.039}
+    results = {
+        "load_file.csv[10000x5]": 0.200,
+        "engine._heal_code[10000x5]": 0.0009,
+        "report.generate_pdf[200 msgs]": 0.070,  # 1.8x, but only 31 ms: run-to-run jitter
+        "insights.forecast_many[10000x5]": 1.0,
+    }
+
+    regressions = compare(results, baseline, threshold=1.5)
+    assert [r[0] for r in regressions] == ["load_file.csv[10000x5]"]
+
+
+def test_make_dataset_shape():
+    df = make_dataset(1_000, 50)
+    assert df.shape == (1_000, 50)
+
+
+def test_scripted_model_walks_the_turn():
+    """The fake LLM emits one scripted tool call per step, then the final answer."""
+    from langchain_core.messages import HumanMessage, ToolMessage
+    from load_harness import ScriptedChatModel
+
+    turn = {"steps": [{"tool": "sql_analysis", "args": {"query": "SELECT 1"}}], "final": "Done here."}
+    model = ScriptedChatModel(turn=turn, latency_s=0)
+
+    first = model.invoke([HumanMessage(content="hi")])
+    assert first.tool_calls[0]["name"] == "sql_analysis"
+
+    second = model.invoke([HumanMessage(content="hi"), first,
+                           ToolMessage(content="1", tool_call_id=first.tool_calls[0]["id"])])
+    assert second.content == "Done here."
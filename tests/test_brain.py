@@ -0,0 +1,60 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+import importlib
+import pytest
+from langchain_core.messages import HumanMessage
+from nexus_engine import DataEngine
+from load_harness import ScriptedChatModel
+
+
+@pytest.fixture(scope="module")
+def brain(tmp_path_factory):
+    """nexus_brain with placeholder keys (it reads Streamlit secrets at import)."""
+    secrets_dir = tmp_path_factory.mktemp("secrets")
+    (secrets_dir / ".streamlit").mkdir()
+    (secrets_dir / ".streamlit" / "secrets.toml").write_text('GROQ_API_KEYS = "test"\nTAVILY_API_KEYS = "test"\n')
+    cwd = os.getcwd()
+    os.chdir(secrets_dir)
+    try:
+        yield importlib.import_module("nexus_brain")
+    finally:
+        os.chdir(cwd)
+
+
+def run_turn(brain, steps, budget=None):
+    turn = {"steps": steps, "final": "All done."}
+    app = brain.build_agent_graph(DataEngine(), chat_model_factory=lambda m, k: ScriptedChatModel(turn=turn, latency_s=0),
+                                  budget=budget)
+    return app.invoke({"messages": [HumanMessage(content="go")]}, config={"recursion_limit": 60})
+
+
+def test_repeated_failing_code_stops_early(brain):
+    """The same failing code twice ends the turn with a budget-exhausted partial answer."""
+    bad = {"tool": "python_analysis", "args": {"code": "print(undefined_name)"}}
+    final = run_turn(brain, [bad] * 10)
+
+    assert final["budget_status"] == "exhausted"
+    assert final["tool_calls"] == 2
+    assert "turn budget exhausted" in final["messages"][-1].content
+
+
+def test_llm_call_budget(brain):
+    """Hitting the LLM-call cap returns the latest successful tool output."""
+    ok = {"tool": "python_analysis", "args": {"code": "print('partial result')"}}
+    final = run_turn(brain, [ok] * 10, budget={"max_llm_calls": 3})
+
+    assert final["llm_calls"] == 3
+    assert "partial result" in final["messages"][-1].content
+
+
+def test_within_budget_completes(brain):
+    ok = {"tool": "python_analysis", "args": {"code": "print(1)"}}
+    final = run_turn(brain, [ok])
+
+    assert final["budget_status"] == "ok"
+    assert final["messages"][-1].content == "All done."
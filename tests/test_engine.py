@@ -6,8 +6,11 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
+import numpy as np
+import pandas as pd
 from io import BytesIO
 from nexus_engine import DataEngine
+from nexus_registry import DatasetRegistry
 
 # Fixture to initialize the engine before each test
 @pytest.fixture
@@ -35,3 +38,101 @@ def test_load_csv(engine):
     assert engine.df is not None
     assert len(engine.df) == 3
     assert "col1" in engine.df.columns
+
+def test_load_exposes_samples(engine):
+    """Loading data publishes df_sample and the approx helper in the sandbox scope."""
+    dummy_file = BytesIO(b"col1,col2\n1,10\n2,20\n3,30")
+    dummy_file.name = "test_data.csv"
+    engine.load_file(dummy_file)
+
+    assert "df_sample" in engine.scope
+    assert "approx" in engine.scope
+    assert not engine.sampling_active
+
+def test_sql_analysis(engine):
+    """SQL runs over the loaded df and is returned in the same format as Python output."""
+    dummy_file = BytesIO(b"col1,col2\n1,10\n2,20\n3,30")
+    dummy_file.name = "test_data.csv"
+    engine.load_file(dummy_file)
+
+    result = engine.run_sql_analysis("SELECT SUM(col2) AS total FROM df")
+    assert result.startswith("Output:")
+    assert "60" in result
+    assert engine.scope["sql_result"]["total"].iloc[0] == 60
+
+def test_second_upload_keeps_first(engine):
+    """Each upload becomes a named table, so both can be joined in SQL."""
+    sales = BytesIO(b"region,revenue\nnorth,10\nsouth,20")
+    sales.name = "sales.csv"
+    regions = BytesIO(b"region,manager\nnorth,Ana\nsouth,Raj")
+    regions.name = "regions.csv"
+    engine.load_file(sales)
+    engine.load_file(regions)
+
+    assert engine.workspace.names() == ["sales", "regions"]
+    result = engine.run_sql_analysis(
+        "SELECT manager FROM sales JOIN regions USING (region) ORDER BY revenue DESC LIMIT 1")
+    assert "Raj" in result
+
+def test_sql_output_is_bounded(engine):
+    """SELECT * on a wide table is cut to the column limit and the character cap."""
+    engine.scope["wide"] = pd.DataFrame(np.arange(1000 * 500).reshape(1000, 500),
+                                        columns=[f"c{i}" for i in range(500)])
+    result = engine.run_sql_analysis("SELECT * FROM wide")
+
+    assert "showing first 20 of 500 columns" in result
+    assert "c19" in result and "c20 " not in result
+    assert len(result) < engine.max_output_chars + 500
+    assert engine.scope["sql_result"].shape == (50, 500)
+
+def test_sql_after_spilled_table_reloads():
+    """A table that spilled to disk and was reloaded is still queryable, and so is df."""
+    engine = DataEngine(memory_budget_mb=0.25, dataset_registry=DatasetRegistry())
+    for name in ("first.csv", "select.csv"):
+        upload = BytesIO(pd.DataFrame({"id": np.arange(10_000), "value": 1.0}).to_csv(index=False).encode())
+        upload.name = name
+        engine.load_file(upload)
+    assert not engine.workspace.is_resident("first")
+
+    assert "10000" in engine.run_sql_analysis("SELECT COUNT(*) AS n FROM first")
+    engine.run_python_analysis("print(len(tables['first']))")
+    assert engine.workspace.is_resident("first")
+
+    assert "10000" in engine.run_sql_analysis("SELECT COUNT(*) AS n FROM first")
+    assert "10000" in engine.run_sql_analysis("SELECT SUM(value) AS total FROM t_select")
+    assert "10000" in engine.run_sql_analysis("SELECT COUNT(*) AS n FROM df")
+
+def test_upload_survives_unspillable_table():
+    """A table that can't spill doesn't break the next upload or leave engine state half-updated."""
+    engine = DataEngine(memory_budget_mb=0.25, dataset_registry=DatasetRegistry())
+    mixed = BytesIO(pd.DataFrame({"id": np.arange(6_000), "code": [1, "x"] * 3_000}).to_json(orient="records").encode())
+    mixed.name = "mixed.json"
+    assert "Data Loaded" in engine.load_file(mixed)
+
+    upload = BytesIO(pd.DataFrame({"id": np.arange(20_000), "value": 1.0}).to_csv(index=False).encode())
+    upload.name = "big.csv"
+    upload.file_id = "big-1"
+    assert "Data Loaded" in engine.load_file(upload)
+
+    assert engine.scope["df"] is engine.df and len(engine.df) == 20_000
+    assert engine.column_str == "id, value"
+    assert engine.workspace.is_resident("mixed")
+    assert "already in workspace" in engine.load_file(upload)
+
+def test_output_is_bounded():
+    """A runaway print loop is cut to head + tail with a truncation marker."""
+    engine = DataEngine(max_output_chars=200)
+    result = engine.run_python_analysis("for i in range(100000): print(i)")
+
+    assert "characters truncated" in result
+    assert "99999" in result
+    assert len(result) < 500
+    assert engine.last_output_stats["captured_bytes"] > engine.last_output_stats["sent_bytes"]
+
+
+def test_printed_dataframe_is_summarized(engine):
+    """print(df) on a large frame sends shape, head and describe() instead of every row."""
+    result = engine.run_python_analysis("print(pd.DataFrame({'a': range(1000)}))")
+
+    assert "1,000 rows x 1 columns" in result
+    assert "Summary:" in result
@@ -0,0 +1,176 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import nexus_insights
+from nexus_insights import InsightModule, MIN_PARALLEL_GROUPS
+
+
+@pytest.fixture
+def insights():
+    return InsightModule()
+
+
+@pytest.fixture
+def regional_sales():
+    """Three regions with 20 daily points each, plus one region that is too short."""
+    dates = pd.date_range("2024-01-01", periods=20, freq="D")
+    frames = [
+        pd.DataFrame({"region": r, "date": dates, "revenue": np.arange(20) * (i + 1) + 100.0})
+        for i, r in enumerate(["north", "south", "west"])
+    ]
+    frames.append(pd.DataFrame({"region": "tiny", "date": dates[:5], "revenue": 1.0}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_forecast_many_returns_tidy_frame(insights, regional_sales, capsys):
+    """Each long-enough group gets `periods` forecast rows; short groups are skipped."""
+    result = insights.forecast_many(regional_sales, "date", "revenue", "region", periods=5)
+
+    assert list(result.columns) == ["region", "date", "forecast"]
+    assert sorted(result["region"].unique()) == ["north", "south", "west"]
+    assert (result.groupby("region").size() == 5).all()
+    assert "tiny" in capsys.readouterr().out
+
+
+def test_forecast_many_reuses_cache(insights, regional_sales, capsys):
+    """A second call on unchanged data is served from the fit cache."""
+    insights.forecast_many(regional_sales, "date", "revenue", "region", periods=5)
+    capsys.readouterr()
+    insights.forecast_many(regional_sales, "date", "revenue", "region", periods=5)
+
+    assert "reused from cache: 3" in capsys.readouterr().out
+
+
+def many_regions(count, periods=20):
+    dates = pd.date_range("2024-01-01", periods=periods, freq="D")
+    return pd.concat([
+        pd.DataFrame({"region": f"r{i:02d}", "date": dates, "revenue": np.arange(periods) * (i + 1) + 100.0})
+        for i in range(count)
+    ], ignore_index=True)
+
+
+def test_forecast_many_process_pool(insights):
+    """Enough groups go through the process pool and match the in-process fits."""
+    df = many_regions(MIN_PARALLEL_GROUPS + 1)
+    result = insights.forecast_many(df, "date", "revenue", "region", periods=5, max_workers=2)
+
+    assert result["region"].nunique() == MIN_PARALLEL_GROUPS + 1
+    serial = InsightModule().forecast_many(df[df["region"] == "r00"], "date", "revenue", "region", periods=5)
+    assert np.allclose(result[result["region"] == "r00"]["forecast"], serial["forecast"])
+
+
+def test_forecast_many_caps_panels(insights, monkeypatch, capsys):
+    """Only the largest groups are plotted; the rest are reported, not dropped."""
+    monkeypatch.setattr(nexus_insights, "MAX_FORECAST_PANELS", 2)
+    result = insights.forecast_many(many_regions(3), "date", "revenue", "region", periods=5)
+
+    titles = [ax.get_title() for ax in plt.gcf().axes if ax.get_visible()]
+    assert titles == ["r02", "r01"]
+    assert result["region"].nunique() == 3
+    assert "1 smaller groups" in capsys.readouterr().out
+    plt.close("all")
+
+
+def test_forecast_many_chart_reaches_the_sandbox():
+    """A grid with empty trailing cells is still picked up as the turn's chart."""
+    from nexus_engine import DataEngine
+    engine = DataEngine()
+    engine.scope["sales"] = many_regions(4)
+    result = engine.run_python_analysis("insights.forecast_many(sales, 'date', 'revenue', 'region', periods=5)")
+
+    assert "[CHART GENERATED]" in result
+    assert len(engine.latest_figure.axes) == 4
+    plt.close("all")
+
+
+def test_forecast_cache_is_bounded(insights, monkeypatch):
+    monkeypatch.setattr(nexus_insights, "FORECAST_CACHE_SIZE", 3)
+    insights.forecast_many(many_regions(5), "date", "revenue", "region", periods=5, max_workers=1)
+
+    assert len(insights._forecast_cache) == 3
+    plt.close("all")
+
+
+def test_forecast_many_reports_fit_failures(insights, regional_sales, monkeypatch, capsys):
+    """When every fit fails the message says so instead of blaming the data length."""
+    def broken_fit(series, periods):
+        raise ValueError("singular matrix")
+    monkeypatch.setattr(nexus_insights, "_fit_group_forecast", broken_fit)
+
+    assert insights.forecast_many(regional_sales, "date", "revenue", "region", periods=5) is None
+    out = capsys.readouterr().out
+    assert "failed to fit for every group" in out
+    assert "enough data points" not in out
+
+
+@pytest.fixture
+def wide_numeric():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(500, 6)), columns=list("abcdef"))
+    df["target"] = df["a"] * 2 - df["b"] + rng.normal(scale=0.1, size=500)
+    df.loc[::7, "c"] = np.nan
+    df.loc[::11, "target"] = np.nan
+    return df
+
+
+def test_correlation_drivers_match_pandas(insights, wide_numeric):
+    """The vectorized path agrees with pandas' pairwise-complete corr()."""
+    columns, Z, mask = insights._standardized_matrix(wide_numeric, "pearson")
+    r, _ = insights._target_correlations(Z, mask, columns.index("target"))
+
+    expected = wide_numeric.corr()["target"].to_numpy()
+    assert np.allclose(r, expected)
+
+
+def test_correlation_drivers_sampling_and_cache(insights, wide_numeric, capsys):
+    """Sampling is reported, and a second target reuses the standardized matrix."""
+    insights.get_correlation_drivers(wide_numeric, "target", max_rows=200)
+    out = capsys.readouterr().out
+    assert "**Top Driver:** a" in out
+    assert "Sampled:" in out
+
+    insights.get_correlation_drivers(wide_numeric, "a", max_rows=200)
+    assert len(insights._corr_cache) == 1
+
+
+def test_mutual_info_skips_empty_and_constant_columns(insights, wide_numeric, capsys):
+    """All-NaN, constant and infinite values don't break mutual information."""
+    df = wide_numeric.assign(empty=np.nan, flat=1.0)
+    df.loc[::13, "d"] = np.inf
+    insights.get_correlation_drivers(df, "target", method="mutual_info")
+
+    out = capsys.readouterr().out
+    assert "**Top Driver:** a" in out
+    assert "empty" not in out and "flat" not in out
+
+
+def test_constant_columns_are_not_drivers(insights, capsys):
+    """Zero-variance columns get NaN like pandas, and a constant target is an error."""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"a": rng.normal(size=300), "flat": 0.1, "target": rng.normal(size=300)})
+    columns, Z, mask = insights._standardized_matrix(df, "pearson")
+    r, _ = insights._target_correlations(Z, mask, columns.index("target"))
+    assert np.allclose(r, df.corr()["target"].to_numpy(), equal_nan=True)
+
+    insights.get_correlation_drivers(df, "flat")
+    assert "No other numeric column varies" in capsys.readouterr().out
+
+
+def test_correlation_cache_and_chart_are_bounded(insights, monkeypatch, capsys):
+    """Oversized matrices are not cached, and the chart keeps only the strongest drivers."""
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(200, 40)), columns=[f"c{i}" for i in range(40)])
+    monkeypatch.setattr(nexus_insights, "CORR_CACHE_MB", 0.01)
+    insights.get_correlation_drivers(df, "c0")
+
+    assert insights._corr_cache == {}
+    assert len(plt.gca().patches) == nexus_insights.MAX_DRIVERS_PLOTTED
+    assert f"strongest {nexus_insights.MAX_DRIVERS_PLOTTED} of 39 columns" in capsys.readouterr().out
+    plt.close("all")
@@ -0,0 +1,76 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gc
+from io import BytesIO
+import numpy as np
+import pandas as pd
+from nexus_engine import DataEngine
+from nexus_registry import DatasetRegistry
+
+CSV = b"col1,col2\n1,10\n2,20\n3,30"
+
+
+def upload(payload=CSV, name="extract.csv"):
+    f = BytesIO(payload)
+    f.name = name
+    return f
+
+
+def test_identical_uploads_are_parsed_once():
+    """Two sessions uploading the same bytes share one parsed frame."""
+    reg = DatasetRegistry()
+    a, b = DataEngine(dataset_registry=reg), DataEngine(dataset_registry=reg)
+    a.load_file(upload())
+    b.load_file(upload())
+
+    stats = reg.stats()
+    assert stats["datasets"] == 1
+    assert stats["sessions"] == 2
+    assert stats["bytes_saved"] == stats["bytes_held"]
+
+
+def test_sandbox_writes_are_copy_on_write():
+    """Mutating df in one session never shows up in another."""
+    reg = DatasetRegistry()
+    a, b = DataEngine(dataset_registry=reg), DataEngine(dataset_registry=reg)
+    a.load_file(upload())
+    b.load_file(upload())
+
+    a.run_python_analysis("df.loc[0, 'col1'] = 999\ndf['extra'] = 1\nprint('ok')")
+
+    assert b.df.loc[0, 'col1'] == 1
+    assert "extra" not in b.df.columns
+
+
+def test_release_on_session_end_and_eviction():
+    """Ending a session drops its reference; idle datasets are evicted past the cap."""
+    reg = DatasetRegistry(cap_mb=0)
+    engine = DataEngine(dataset_registry=reg)
+    engine.load_file(upload())
+    assert reg.stats()["datasets"] == 1  # still referenced, so kept despite the cap
+
+    del engine
+    gc.collect()
+    assert reg.stats()["datasets"] == 0
+
+
+def test_spilled_shared_dataset_is_released_and_reacquired():
+    """Spilling a shared frame drops the session's reference; reloading takes the registry copy back."""
+    reg = DatasetRegistry()
+    other = DataEngine(dataset_registry=reg)
+    engine = DataEngine(memory_budget_mb=0.25, dataset_registry=reg)
+    big = pd.DataFrame({"id": range(10_000), "value": 1.5}).to_csv(index=False).encode()
+    other.load_file(upload(big, "first.csv"))
+    engine.load_file(upload(big, "first.csv"))
+    engine.load_file(upload(big.replace(b"1.5", b"2.5"), "second.csv"))
+
+    assert not engine.workspace.is_resident("first")
+    assert reg.stats()["sessions"] == 2  # other + engine's 'second'; 'first' was released
+
+    reloaded = engine.workspace["first"]
+    assert reg.stats()["sessions"] == 3
+    assert np.shares_memory(reloaded["value"].to_numpy(), other.df["value"].to_numpy())
@@ -0,0 +1,73 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from nexus_sampling import ApproxQuery, reservoir_sample
+
+
+def make_sales(rows=60_000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "region": rng.choice(["north", "south", "east"], size=rows),
+        "revenue": rng.normal(100, 20, size=rows),
+    })
+
+
+def test_reservoir_sample_is_bounded():
+    """The uniform sample never exceeds its size and keeps the original rows."""
+    df = make_sales()
+    sample = reservoir_sample(df, k=500)
+    assert len(sample) == 500
+    assert sample.index.isin(df.index).all()
+
+
+def test_approx_bounds_cover_truth():
+    """Estimates come with 95% bounds that contain the exact answer."""
+    df = make_sales()
+    approx = ApproxQuery(df)
+
+    est = approx.mean("revenue")
+    assert est["ci_low"].iloc[0] <= df["revenue"].mean() <= est["ci_high"].iloc[0]
+
+    by_region = approx.sum("revenue", by="region")
+    truth = df.groupby("region")["revenue"].sum()
+    assert ((by_region["ci_low"] <= truth) & (truth <= by_region["ci_high"])).all()
+
+
+def test_approx_sum_with_nulls():
+    """Sums on a column with missing values are not scaled up by the null rows."""
+    df = make_sales()
+    df.loc[df.sample(frac=0.3, random_state=0).index, "revenue"] = np.nan
+    approx = ApproxQuery(df)
+
+    est = approx.sum("revenue")
+    assert est["ci_low"].iloc[0] <= df["revenue"].sum() <= est["ci_high"].iloc[0]
+
+    by_region = approx.sum("revenue", by="region")
+    truth = df.groupby("region")["revenue"].sum()
+    assert ((by_region["ci_low"] <= truth) & (truth <= by_region["ci_high"])).all()
+
+    mean = approx.mean("revenue")
+    assert mean["ci_low"].iloc[0] <= df["revenue"].mean() <= mean["ci_high"].iloc[0]
+
+
+def test_approx_sum_by_non_strata_column():
+    """Totals by a column other than the strata key keep ~95% coverage across datasets."""
+    covered = []
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        df = make_sales(20_000)
+        df["channel"] = rng.choice(["web", "store", "phone", "partner", "other"], size=len(df),
+                                   p=[.4, .3, .15, .1, .05])
+        df.loc[rng.random(len(df)) < 0.2, "revenue"] = np.nan
+        approx = ApproxQuery(df)
+        assert approx.strata_col == "region"
+
+        est = approx.sum("revenue", by="channel")
+        truth = df.groupby("channel")["revenue"].sum()
+        covered.extend((est["ci_low"] <= truth) & (truth <= est["ci_high"]))
+    assert np.mean(covered) >= 0.85
@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Wall-clock budget for everything imported before the login form renders
+STARTUP_BUDGET_S = 3.0
+
+# Modules that must stay out of the process until they are actually used
+HEAVY = ["pandas", "matplotlib", "sklearn", "statsmodels", "scipy", "seaborn",
+         "langchain_groq", "langchain_community", "langgraph", "supabase", "duckdb"]
+
+
+def profile_imports(code):
+    """Runs `code` in a fresh interpreter; returns (seconds, heavy modules that got executed)."""
+    probe = f"""
+import sys, time, json
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY!r} if m in sys.modules]
+print(json.dumps([elapsed, loaded]))
+"""
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_login_screen_imports_are_light():
+    """Everything nexus_core imports before the login gate stays within budget and skips heavy deps."""
+    elapsed, loaded = profile_imports(
+        "import nexus_db, nexus_security, nexus_report, nexus_telemetry, themes")
+
+    assert loaded == []
+    assert elapsed < STARTUP_BUDGET_S
+
+
+def test_engine_defers_analytics_stack():
+    """A fresh DataEngine doesn't pay for sklearn, statsmodels, seaborn or DuckDB."""
+    _, loaded = profile_imports("import nexus_engine; nexus_engine.DataEngine()")
+
+    assert not {"sklearn", "statsmodels", "scipy", "seaborn", "duckdb"} & set(loaded)
+
+
+def test_prewarm_and_sandbox_share_seaborn_safely():
+    """The prewarm thread and sandbox threads touching sns at once all get the real module."""
+    probe = """
+import threading, nexus_engine
+warm = nexus_engine.prewarm_analytics()
+errors = []
+def plot():
+    try:
+        assert callable(nexus_engine.sns.barplot)
+    except Exception as e:
+        errors.append(repr(e))
+threads = [threading.Thread(target=plot) for _ in range(8)]
+for t in threads: t.start()
+for t in threads + [warm]: t.join()
+print(errors)
+"""
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
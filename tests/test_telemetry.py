@@ -0,0 +1,67 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+import nexus_telemetry
+from nexus_telemetry import Telemetry, telemetry, span, traced, context
+
+
+@pytest.fixture(autouse=True)
+def clean_telemetry():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+def test_span_records_tags_and_errors():
+    """Spans carry context tags and count failures."""
+    with context(session="alice-Session-1"):
+        with span("llm_call", model="llama"):
+            pass
+        with pytest.raises(ValueError):
+            with span("llm_call", model="llama"):
+                raise ValueError("boom")
+
+    [row] = telemetry.snapshot(by=("span", "model"), session="alice-Session-1")
+    assert row["count"] == 2
+    assert row["errors"] == 1
+
+
+def test_percentiles_and_exports():
+    """Percentiles come from recorded durations and both export formats include them."""
+    stats = Telemetry()
+    for ms in range(1, 101):
+        stats.record("db.load_history", ms / 1000)
+
+    [row] = stats.snapshot()
+    assert row["p50_ms"] == pytest.approx(51)
+    assert row["p99_ms"] == pytest.approx(100)
+    assert 'nexus_span_seconds{span="db.load_history",quantile="0.99"} 0.100000' in stats.to_prometheus()
+    assert json.loads(stats.to_json())[0]["count"] == 100
+
+
+def test_traced_decorator():
+    @traced("report.generate_pdf")
+    def work():
+        return 42
+
+    assert work() == 42
+    assert telemetry.snapshot()[0]["span"] == "report.generate_pdf"
+
+
+def test_series_eviction_keeps_busy_series(monkeypatch):
+    """Past MAX_SERIES the least recently recorded series is dropped, not the oldest one."""
+    monkeypatch.setattr(nexus_telemetry, "MAX_SERIES", 3)
+    t = Telemetry()
+    t.record("llm", 0.1)
+    for session in ("a", "b", "c"):
+        t.record("llm", 0.1)
+        t.record("turn", 0.2, session=session)
+
+    rows = {(r["span"], r["session"]): r["count"] for r in t.snapshot(by=("span", "session"))}
+    assert rows[("llm", "")] == 4
+    assert ("turn", "a") not in rows
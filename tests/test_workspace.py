@@ -0,0 +1,49 @@
+import sys
+import os
+
+# --- PATH FIX ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from nexus_workspace import Workspace, table_name_from_file
+
+
+def make_frame(rows=10_000):
+    return pd.DataFrame({"id": np.arange(rows), "value": np.random.default_rng(0).random(rows)})
+
+
+def test_table_name_from_file():
+    assert table_name_from_file("Sales 2024.csv") == "sales_2024"
+    assert table_name_from_file("2024-q1.xlsx") == "t_2024_q1"
+    assert table_name_from_file("Order.csv") == "t_order"  # SQL keywords would need quoting
+
+
+def test_lru_spill_and_reload():
+    """Over budget, the least recently used table spills to disk and reloads intact."""
+    ws = Workspace(memory_budget_mb=0.25)  # room for roughly one 160 KB frame
+    first = make_frame()
+    ws.add("first", first)
+    ws.add("second", make_frame(), pin=True)
+
+    assert not ws.is_resident("first")
+    assert os.path.exists(ws.spill_path("first"))
+    assert "on disk" in ws.summary()
+
+    pd.testing.assert_frame_equal(ws["first"], first)
+    assert ws.is_resident("first")
+    assert ws.is_resident("second")  # pinned tables never spill
+
+
+def test_unwritable_table_stays_in_memory(capsys):
+    """A frame Parquet can't store (mixed-type object column) is kept resident instead of raising."""
+    ws = Workspace(memory_budget_mb=0.25)
+    mixed = make_frame().astype({"value": object})
+    mixed.loc[0, "value"] = "n/a"
+    ws.add("mixed", mixed)
+    ws.add("second", make_frame(), pin=True)
+
+    assert ws.is_resident("mixed")
+    assert "Workspace Warning" in capsys.readouterr().out
+    ws.add("third", make_frame(), pin=True)  # not retried on every add
+    assert capsys.readouterr().out == ""